@@ -1,37 +1,81 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, AsyncIterator, Optional, List
+from collections import OrderedDict
+from functools import lru_cache
+import asyncio
+import hashlib
+import random
+import time
+import httpx
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
 
 from app.config import settings
 from app.utils.logger import app_logger as logger
 
 
+@lru_cache(maxsize=None)
+def _get_llm(provider: str, model: str, temperature: float, max_tokens: int):
+    """Get a shared LLM client so all agents reuse one connection pool."""
+    http_async_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(30.0, connect=10.0)
+    )
+
+    #this is beacuase intiallty we weren't sure of which model we'll use
+    # Import lazily so only the configured provider's SDK is loaded
+    if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
+        return ChatAnthropic(
+            model=model,
+            anthropic_api_key=settings.ANTHROPIC_API_KEY,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            http_async_client=http_async_client
+        )
+    else:  # openai
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model,
+            openai_api_key=settings.OPENAI_API_KEY,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            http_async_client=http_async_client
+        )
+
+
 class BaseAgent:
-    
+
+    # Max cached responses per agent before oldest entries are evicted
+    RESPONSE_CACHE_SIZE = 1024
+
+    # Micro-batching: coalesce concurrent calls arriving within this window
+    MICRO_BATCH_WINDOW = 0.02  # seconds
+    MAX_BATCH_SIZE = 16
+
+    # Per-call timeout and bounded retries so a stalled provider can't
+    # pin coroutines indefinitely
+    LLM_TIMEOUT = 30.0  # seconds
+    MAX_LLM_ATTEMPTS = 3
+
     def __init__(self, name: str, system_prompt: str):
-      
+
         self.name = name
         self.system_prompt = system_prompt
+        # Built once so every call reuses the same stable prefix object
+        self._system_message = SystemMessage(content=system_prompt)
+        # Hash the immutable prompt once so cache keys don't re-process
+        # hundreds of constant characters per lookup
+        self._cache_prefix = hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()
         self.llm = self._initialize_llm()
+        self._response_cache: OrderedDict[str, str] = OrderedDict()
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
         logger.info(f"Agent '{name}' initialized")
     
-    def _initialize_llm(self):
-        #this is beacuase intiallty we weren't sure of which model we'll use 
-        if settings.LLM_PROVIDER == "anthropic":
-            return ChatAnthropic(
-                model=settings.LLM_MODEL,
-                anthropic_api_key=settings.ANTHROPIC_API_KEY,
-                temperature=0.7,
-                max_tokens=1024
-            )
-        else:  # openai
-            return ChatOpenAI(
-                model=settings.LLM_MODEL,
-                openai_api_key=settings.OPENAI_API_KEY,
-                temperature=0.7,
-                max_tokens=1024
-            )
+    def _initialize_llm(self, model_override: Optional[str] = None, max_tokens: int = 1024):
+        model = model_override or settings.LLM_MODEL
+        return _get_llm(settings.LLM_PROVIDER, model, 0.7, max_tokens)
     
     def create_messages(
         self,
@@ -39,7 +83,7 @@ class BaseAgent:
         context: Optional[Dict[str, Any]] = None
     ) -> List[BaseMessage]:
      
-        messages = [SystemMessage(content=self.system_prompt)]
+        messages = [self._system_message]
         
         if context:
             context_str = self._format_context(context)
@@ -52,21 +96,136 @@ class BaseAgent:
     
     def _format_context(self, context: Dict[str, Any]) -> str:
         """Format context dictionary into string."""
-        formatted = []
-        for key, value in context.items():
-            if value:
-                formatted.append(f"- {key}: {value}")
-        return "\n".join(formatted) if formatted else ""
+        items = tuple(sorted((key, str(value)) for key, value in context.items() if value))
+        return self._format_context_cached(items) if items else ""
+
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _format_context_cached(items: tuple) -> str:
+        """Join pre-filtered context items, cached across repeated turns."""
+        return "\n".join(f"- {key}: {value}" for key, value in items)
     
-    async def process(
+    def _cache_key(self, user_message: str, context: Optional[Dict[str, Any]]) -> str:
+        """Build cache key from the prompt hash, context and message."""
+        context_str = self._format_context(context) if context else ""
+        return f"{self._cache_prefix}\n{context_str}\n{user_message.strip().lower()}"
+
+    def _cache_lookup(self, key: str) -> Optional[str]:
+        """Return cached response for key, refreshing its LRU position."""
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+            logger.info(f"Response cache hit for {self.name}")
+        return cached
+
+    def _cache_store(self, key: str, response: str):
+        """Store response in cache, evicting oldest entry when full."""
+        self._response_cache[key] = response
+        if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+
+    async def _ainvoke_batched(self, messages: List[BaseMessage]):
+        """Queue an LLM call so concurrent requests share one batch."""
+        if self._batch_queue is None:
+            self._batch_queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_worker())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((messages, future))
+        return await future
+
+    async def _batch_worker(self):
+        """Drain queued calls in micro-batches through llm.abatch."""
+        while True:
+            batch = [await self._batch_queue.get()]
+
+            # Wait briefly so concurrent callers can join this batch
+            await asyncio.sleep(self.MICRO_BATCH_WINDOW)
+            while len(batch) < self.MAX_BATCH_SIZE and not self._batch_queue.empty():
+                batch.append(self._batch_queue.get_nowait())
+
+            try:
+                responses = await self._invoke_with_retry([messages for messages, _ in batch])
+                for (_, future), response in zip(batch, responses):
+                    if not future.done():
+                        future.set_result(response)
+            except Exception as e:
+                logger.error(f"Error in {self.name} batch worker: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _invoke_with_retry(self, batch_messages: List[List[BaseMessage]]):
+        """Call the LLM with a per-attempt timeout and jittered backoff."""
+        last_error = None
+
+        for attempt in range(self.MAX_LLM_ATTEMPTS):
+            started = time.monotonic()
+            try:
+                return await asyncio.wait_for(
+                    self.llm.abatch(batch_messages),
+                    timeout=self.LLM_TIMEOUT
+                )
+            except (asyncio.TimeoutError, httpx.HTTPError) as e:
+                elapsed_ms = (time.monotonic() - started) * 1000
+                last_error = e
+                logger.warning(
+                    f"{self.name} LLM attempt {attempt + 1} failed after "
+                    f"{elapsed_ms:.0f}ms: {e}"
+                )
+                if attempt < self.MAX_LLM_ATTEMPTS - 1:
+                    await asyncio.sleep(random.uniform(0.1, 0.4) * 2 ** attempt)
+
+        raise last_error
+
+    async def stream(
         self,
         user_message: str,
         context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Stream response tokens as they arrive instead of waiting
+        for the full completion, so callers can forward chunks and cut
+        time-to-first-token."""
+        cache_key = self._cache_key(user_message, context)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        messages = self.create_messages(user_message, context)
+        chunks = []
+        async for chunk in self.llm.astream(messages):
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+
+        self._cache_store(cache_key, "".join(chunks))
+
+    async def process(
+        self,
+        user_message: str,
+        context: Optional[Dict[str, Any]] = None,
+        on_token=None
     ) -> str:
 
         try:
+            # With an on_token callback, stream chunks out as they arrive
+            # so the caller can forward them before the reply completes
+            if on_token is not None:
+                chunks = []
+                async for chunk in self.stream(user_message, context):
+                    chunks.append(chunk)
+                    await on_token(chunk)
+                return "".join(chunks)
+
+            cache_key = self._cache_key(user_message, context)
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
+
             messages = self.create_messages(user_message, context)
-            response = await self.llm.ainvoke(messages)
+            response = await self._ainvoke_batched(messages)
+            self._cache_store(cache_key, response.content)
             return response.content
         except Exception as e:
             logger.error(f"Error in {self.name}: {e}")
@@ -1,5 +1,6 @@
 from typing import Dict, Any, Optional
-from datetime import datetime
+from collections import OrderedDict
+import asyncio
 from app.agents.base_agent import BaseAgent
 from app.services.appointment_service import appointment_service
 from app.services.doctor_service import doctor_service
@@ -9,47 +10,29 @@ from app.utils.logger import app_logger as logger
 
 class ConfirmationAgent(BaseAgent):
     """Agent responsible for confirming and finalizing appointments."""
-    
+
+    # Max cached confirmation replies before oldest entries are evicted
+    REPLY_CACHE_SIZE = 4096
+
     def __init__(self):
+        # Kept short on purpose: the confirmation/success templates are
+        # rendered deterministically in Python below, so the prompt only
+        # needs behavioral rules for free-form follow-ups
         system_prompt = """You are a professional medical appointment confirmation specialist at BookaDoc clinic.
 
-Your responsibilities:
-1. Confirm appointment details with the patient
-2. Create the appointment in the system
-3. Provide confirmation details clearly
-4. Answer any final questions
-
 Guidelines:
-- Present all details for confirmation before finalizing
 - Be clear and precise about date, time, and doctor
-- Provide a confirmation number/ID
+- Present all details for confirmation before finalizing
 - Give any necessary instructions (arrive early, bring documents, etc.)
-- End on a positive, reassuring note
-
-Confirmation format:
-"Let me confirm your appointment details:
-- Patient: [Name]
-- Doctor: [Doctor Name & Specialization]
-- Date & Time: [Day, Date at Time]
-- Reason: [Reason]
-
-Is this correct? Please reply 'confirm' to finalize your appointment."
-
-After confirmation:
-"✅ Your appointment is confirmed!
-
-Appointment ID: [ID]
-Patient: [Name]
-Doctor: [Doctor Name]
-Date: [Date] at [Time]
-
-Please arrive 10 minutes early. If you need to reschedule, please call us at least 24 hours in advance.
-
-Is there anything else I can help you with?"
+- Answer final questions briefly and end on a positive, reassuring note
 """
         super().__init__(name="Confirmation", system_prompt=system_prompt)
-    
-    async def create_confirmation_message(
+
+        # Deterministic replies keyed by the exact booking entities, so
+        # re-confirming the same slot replays the prebuilt string
+        self._reply_cache: OrderedDict[tuple, str] = OrderedDict()
+
+    def create_confirmation_message(
         self,
         patient_info: Dict[str, Any],
         selected_slot: Dict[str, Any]
@@ -64,22 +47,48 @@ Is there anything else I can help you with?"
         Returns:
             Confirmation message
         """
-        date_obj = datetime.fromisoformat(selected_slot["date"])
-        time_obj = datetime.fromisoformat(selected_slot["time"]).time()
-        
-        formatted_date = date_obj.strftime("%A, %B %d, %Y")
-        formatted_time = time_obj.strftime("%I:%M %p")
-        
+        # Every field rendered into the message is part of the key, so
+        # re-confirming after correcting e.g. a misspelled name never
+        # replays a stale string
+        cache_key = (
+            selected_slot['doctor_id'],
+            selected_slot['date'],
+            selected_slot['time'],
+            patient_info.get('patient_name'),
+            patient_info.get('patient_phone'),
+            patient_info.get('reason')
+        )
+        cached = self._reply_cache.get(cache_key)
+        if cached is not None:
+            self._reply_cache.move_to_end(cache_key)
+            return cached
+
+        # Unpack once so the f-string reads locals instead of repeated
+        # dict lookups
+        patient_name = patient_info.get('patient_name')
+        patient_phone = patient_info.get('patient_phone')
+        reason = patient_info.get('reason')
+        doctor_name = selected_slot['doctor_name']
+        specialization = selected_slot['doctor_specialization']
+
+        # Slot dicts carry date/time objects, so no ISO parsing needed
+        formatted_date = selected_slot["date"].strftime("%A, %B %d, %Y")
+        formatted_time = selected_slot["time"].strftime("%I:%M %p")
+
         message = f"""Let me confirm your appointment details:
 
-👤 **Patient:** {patient_info.get('patient_name')}
-📞 **Phone:** {patient_info.get('patient_phone')}
-👨‍⚕️ **Doctor:** {selected_slot['doctor_name']} ({selected_slot['doctor_specialization']})
+👤 **Patient:** {patient_name}
+📞 **Phone:** {patient_phone}
+👨‍⚕️ **Doctor:** {doctor_name} ({specialization})
 📅 **Date & Time:** {formatted_date} at {formatted_time}
-📝 **Reason:** {patient_info.get('reason')}
+📝 **Reason:** {reason}
 
 Is this correct? Please reply '**confirm**' to finalize your appointment, or let me know if you'd like to make any changes."""
-        
+
+        self._reply_cache[cache_key] = message
+        if len(self._reply_cache) > self.REPLY_CACHE_SIZE:
+            self._reply_cache.popitem(last=False)
+
         return message
     
     async def finalize_appointment(
@@ -98,35 +107,35 @@ Is this correct? Please reply '**confirm**' to finalize your appointment, or let
             Appointment details or None if failed
         """
         try:
-            # Get doctor
-            doctor = await doctor_service.get_doctor_by_id(selected_slot['doctor_id'])
-            
+            # Fetch doctor concurrently with the local date parsing
+            doctor_task = asyncio.create_task(
+                doctor_service.get_doctor_by_id(selected_slot['doctor_id'])
+            )
+
+            appointment_date = selected_slot["date"]
+            appointment_time = selected_slot["time"]
+
+            doctor = await doctor_task
+
             if not doctor:
                 logger.error(f"Doctor not found: {selected_slot['doctor_id']}")
                 return None
-            
-            appointment_date = datetime.fromisoformat(selected_slot["date"]).date()
-            appointment_time = datetime.fromisoformat(selected_slot["time"]).time()
-            
-            # Create appointment
+
+            # Create appointment directly as confirmed, avoiding a second
+            # status-update round trip to the database
             result = await appointment_service.create_appointment(
                 patient_name=patient_info['patient_name'],
                 patient_phone=patient_info['patient_phone'],
                 patient_email=patient_info.get('patient_email'),
                 appointment_date=appointment_date,
                 appointment_time=appointment_time,
-                doctor_id=doctor.doctor_id, 
+                doctor_id=doctor.doctor_id,
                 doctor_name=f"Dr. {doctor.name}",
-                reason=patient_info['reason']
+                reason=patient_info['reason'],
+                status=AppointmentStatus.CONFIRMED
             )
-            
+
             if result.success:
-                # Update status to confirmed
-                appointment_service.update_appointment_status(
-                    result.appointment.appointment_id,
-                    AppointmentStatus.CONFIRMED
-                )
-                
                 logger.info(f"Appointment confirmed: {result.appointment.appointment_id}")
                 
                 return {
@@ -141,7 +150,7 @@ Is this correct? Please reply '**confirm**' to finalize your appointment, or let
             logger.error(f"Error finalizing appointment: {e}")
             return None
     
-    async def create_success_message(
+    def create_success_message(
         self,
         appointment_details: Dict[str, Any]
     ) -> str:
@@ -175,4 +184,8 @@ Is this correct? Please reply '**confirm**' to finalize your appointment, or let
 
 We look forward to seeing you! Is there anything else I can help you with?"""
         
-        return message
\ No newline at end of file
+        return message
+
+
+# Create singleton instance
+confirmation_agent = ConfirmationAgent()
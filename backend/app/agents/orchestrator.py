@@ -1,16 +1,44 @@
 from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
-from langgraph.graph import StateGraph, END
+import asyncio
+import re
+import sys
 from langchain_core.messages import HumanMessage, AIMessage
 
-from app.agents.receptionist_agent import ReceptionistAgent
-from app.agents.scheduler_agent import SchedulerAgent
-from app.agents.confirmation_agent import ConfirmationAgent
+from app.agents.receptionist_agent import receptionist_agent
+from app.agents.scheduler_agent import scheduler_agent
+from app.agents.confirmation_agent import confirmation_agent
 from app.models.conversation import ConversationState, AgentType
 from app.utils.logger import app_logger as logger
 from langsmith import traceable
 
 
+# Precompiled confirm/reject-intent matchers so the hottest branch of
+# the booking flow never needs an LLM round trip. Word boundaries stop
+# "yes" matching inside "yesterday" or "n" matching every message.
+_CONFIRM_WORDS = frozenset(["yes", "confirm", "ok", "sure", "correct", "right", "yep", "yeah", "y"])
+_REJECT_WORDS = frozenset(["no", "nope", "cancel", "different", "change", "n"])
+_CONFIRM_RE = re.compile(
+    r"\b(yes|confirm|ok|sure|correct|right|yep|yeah|y|go ahead|book it|do it)\b",
+    re.IGNORECASE
+)
+_REJECT_RE = re.compile(r"\b(no|nope|cancel|different|change|n)\b", re.IGNORECASE)
+
+# Matches the first number in a slot-selection reply ("option 10" -> 10)
+_DIGITS_RE = re.compile(r"\d+")
+
+# Tokens worth running LLM extraction for: names, phone numbers, emails,
+# and date/time preferences. Case-insensitivity is scoped to the
+# keyword alternation with (?i:...) — applied pattern-wide it would
+# let the capitalized-name atom match any lowercase word, making the
+# "nothing extractable" skip branch unreachable.
+_EXTRACTABLE_RE = re.compile(
+    r"[A-Z][a-z]+|\d{3,}|@|"
+    r"(?i:\b(?:morning|afternoon|evening|today|tomorrow|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b)"
+)
+
+
 
 class WorkflowState(str, Enum):
     """Workflow states for the orchestrator."""
@@ -24,10 +52,23 @@ class WorkflowState(str, Enum):
     ERROR = "error"
 
 
+# Interned state strings for the hot routing comparisons; state carries
+# plain strings so == hits CPython's pointer-equality fast path instead
+# of Enum member machinery. The Enum stays as the API surface.
+_WS_START = sys.intern(WorkflowState.START.value)
+_WS_GATHERING = sys.intern(WorkflowState.GATHERING_INFO.value)
+_WS_PRESENTING = sys.intern(WorkflowState.PRESENTING_SLOTS.value)
+_WS_AWAITING = sys.intern(WorkflowState.AWAITING_SELECTION.value)
+_WS_CONFIRMING = sys.intern(WorkflowState.CONFIRMING.value)
+_WS_COMPLETED = sys.intern(WorkflowState.COMPLETED.value)
+_WS_ERROR = sys.intern(WorkflowState.ERROR.value)
+
+
 
 class StateKeys:
     """Centralized state key definitions."""
     USER_MESSAGE = "user_message"
+    CONVERSATION_ID = "conversation_id"
     CONVERSATION_HISTORY = "conversation_history"
     PATIENT_INFO = "patient_info"
     AVAILABLE_SLOTS = "available_slots"
@@ -40,80 +81,32 @@ class StateKeys:
     APPOINTMENT_ID = "appointment_id"
     ERROR = "error"
     SLOT_SELECTION_ATTEMPTS = "slot_selection_attempts"
+    PREFETCHED_SLOTS_TASK = "_prefetched_slots_task"
+    ON_TOKEN = "_on_token"
+    USER_MESSAGE_NORM = "_user_message_norm"
+    FORMAT_TASK = "_format_task"
 
 
 class OrchestratorAgent:
     """
-    Main orchestrator using LangGraph to coordinate all agents.
+    Main orchestrator coordinating all agents.
     Manages the appointment booking workflow with clear state transitions.
     """
     
     MAX_SLOT_SELECTION_ATTEMPTS = 3
-    
+
+    # Max sessions processed concurrently in batch mode, bounded so the
+    # LLM provider doesn't start returning rate-limit 429s
+    BATCH_CONCURRENCY = 64
+
     def __init__(self):
-        """Initialize orchestrator with all agents."""
-        self.receptionist = ReceptionistAgent()
-        self.scheduler = SchedulerAgent()
-        self.confirmation = ConfirmationAgent()
-        
-        self.workflow = self._build_workflow()
-        
-        logger.info("Orchestrator initialized with LangGraph workflow")
-    
-    def _build_workflow(self) -> StateGraph:
-        """Build the LangGraph workflow with proper state management."""
-        workflow = StateGraph(dict)
-        
-        # Add nodes (processing states)
-        workflow.add_node("gather_info", self._gather_info_node)
-        workflow.add_node("find_slots", self._find_slots_node)
-        workflow.add_node("present_slots", self._present_slots_node)
-        workflow.add_node("await_selection", self._await_selection_node)
-        workflow.add_node("confirm", self._confirm_node)
-        workflow.add_node("finalize", self._finalize_node)
-        
-        # Set entry point
-        workflow.set_entry_point("gather_info")
-        
-        # Add edges with clear transition logic
-        workflow.add_conditional_edges(
-            "gather_info",
-            self._route_from_gather_info,
-            {
-                "find_slots": "find_slots",
-                "gather_info": "gather_info",
-                END: END
-            }
-        )
-        
-        workflow.add_edge("find_slots", "present_slots")
-        workflow.add_edge("present_slots", "await_selection")
-        
-        workflow.add_conditional_edges(
-            "await_selection",
-            self._route_from_await_selection,
-            {
-                "confirm": "confirm",
-                "await_selection": "await_selection",
-                "present_slots": "present_slots",
-                END: END
-            }
-        )
-        
-        workflow.add_conditional_edges(
-            "confirm",
-            self._route_from_confirm,
-            {
-                "finalize": "finalize",
-                "await_selection": "await_selection",
-                END: END
-            }
-        )
-        
-        workflow.add_edge("finalize", END)
-        
-        return workflow.compile()
-    
+        """Initialize orchestrator with the shared agent instances."""
+        self.receptionist = receptionist_agent
+        self.scheduler = scheduler_agent
+        self.confirmation = confirmation_agent
+
+        logger.info("Orchestrator initialized")
+
     async def _gather_info_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Node for gathering patient information.
@@ -124,28 +117,73 @@ class OrchestratorAgent:
         user_message = state.get(StateKeys.USER_MESSAGE, "")
         conversation_history = state.get(StateKeys.CONVERSATION_HISTORY, [])
         
+        current_info = state.get(StateKeys.PATIENT_INFO, {})
+
         try:
-            # Get response from receptionist
-            response = await self.receptionist.process(
-                user_message=user_message,
-                context=state.get(StateKeys.PATIENT_INFO, {})
-            )
-            
-            # Extract information from conversation
-            extracted = await self.receptionist.extract_information(
-                conversation_history=conversation_history,
-                latest_message=user_message
-            )
-            
-            # Merge extracted info with existing patient info
-            current_info = state.get(StateKeys.PATIENT_INFO, {})
-            updated_info = {**current_info}
-            
-            # Only update non-empty values
+            if self.receptionist.has_required_info(current_info):
+                # Info is already complete, so the slot lookup can start
+                # speculatively while the receptionist reply streams
+                # back; dropped below if extraction changes the info
+                state[StateKeys.PREFETCHED_SLOTS_TASK] = asyncio.create_task(
+                    self.scheduler.get_available_slots(
+                        patient_info=current_info,
+                        num_slots=5
+                    )
+                )
+
+            # Skip extraction only when the message carries nothing
+            # extractable (no names, numbers, emails or times). When the
+            # required info is already complete, extract_information
+            # short-circuits to its regex pass — no LLM cost — but still
+            # picks up changed time/date preferences, e.g. after a
+            # no-slots retry reset the flow back to gathering.
+            if user_message and not _EXTRACTABLE_RE.search(user_message):
+                response = await self.receptionist.process(
+                    user_message=user_message,
+                    context=current_info,
+                    on_token=state.get(StateKeys.ON_TOKEN)
+                )
+                extracted = {}
+            else:
+                # Receptionist reply and extraction are independent, so
+                # run both LLM calls concurrently
+                response, extracted = await asyncio.gather(
+                    self.receptionist.process(
+                        user_message=user_message,
+                        context=current_info,
+                        on_token=state.get(StateKeys.ON_TOKEN)
+                    ),
+                    self.receptionist.extract_information(
+                        conversation_history=conversation_history,
+                        latest_message=user_message,
+                        current_info=current_info,
+                        conversation_id=state.get(StateKeys.CONVERSATION_ID)
+                    ),
+                    return_exceptions=True
+                )
+
+                if isinstance(response, Exception):
+                    raise response
+                if isinstance(extracted, Exception):
+                    logger.error(f"Error extracting information: {extracted}")
+                    extracted = {}
+
+            # Merge extracted info into the patient info in place; the
+            # state owns this dict so no defensive copy is needed
+            updated_info = current_info
+            info_changed = False
             for key, value in extracted.items():
-                if value:
+                if value and updated_info.get(key) != value:
                     updated_info[key] = value
-            
+                    info_changed = True
+
+            if info_changed:
+                # Any slots prefetched above were looked up with the old
+                # preferences; drop the task so find_slots re-queries
+                stale = state.pop(StateKeys.PREFETCHED_SLOTS_TASK, None)
+                if stale is not None:
+                    stale.cancel()
+
             # Check if we have all required information
             has_required = self.receptionist.has_required_info(updated_info)
             
@@ -156,10 +194,10 @@ class OrchestratorAgent:
             state[StateKeys.HAS_REQUIRED_INFO] = has_required
             
             if has_required:
-                state[StateKeys.WORKFLOW_STATE] = WorkflowState.FINDING_SLOTS
+                state[StateKeys.WORKFLOW_STATE] = WorkflowState.FINDING_SLOTS.value
                 logger.info(f"Required info collected: {updated_info}")
             else:
-                state[StateKeys.WORKFLOW_STATE] = WorkflowState.GATHERING_INFO
+                state[StateKeys.WORKFLOW_STATE] = WorkflowState.GATHERING_INFO.value
                 logger.info(f"Still gathering info. Current: {updated_info}")
             
             return state
@@ -167,7 +205,7 @@ class OrchestratorAgent:
         except Exception as e:
             logger.error(f"Error in gather_info_node: {e}")
             state[StateKeys.AGENT_RESPONSE] = "I'm having trouble processing that. Could you please repeat your information?"
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.GATHERING_INFO
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.GATHERING_INFO.value
             return state
     
     async def _find_slots_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -179,20 +217,29 @@ class OrchestratorAgent:
         patient_info = state.get(StateKeys.PATIENT_INFO, {})
         
         try:
-            # Get available slots
-            slots = await self.scheduler.get_available_slots(
-                patient_info=patient_info,
-                num_slots=5
-            )
-            
+            # Use the slots prefetched during gather_info when available
+            prefetched = state.pop(StateKeys.PREFETCHED_SLOTS_TASK, None)
+            if prefetched is not None:
+                slots = await prefetched
+            else:
+                slots = await self.scheduler.get_available_slots(
+                    patient_info=patient_info,
+                    num_slots=5
+                )
+
             if not slots:
                 state[StateKeys.AGENT_RESPONSE] = "I'm sorry, I couldn't find any available slots. Would you like to try different preferences?"
-                state[StateKeys.WORKFLOW_STATE] = WorkflowState.GATHERING_INFO
+                state[StateKeys.WORKFLOW_STATE] = WorkflowState.GATHERING_INFO.value
                 state[StateKeys.HAS_REQUIRED_INFO] = False
             else:
                 state[StateKeys.AVAILABLE_SLOTS] = slots
-                state[StateKeys.WORKFLOW_STATE] = WorkflowState.PRESENTING_SLOTS
+                state[StateKeys.WORKFLOW_STATE] = WorkflowState.PRESENTING_SLOTS.value
                 state[StateKeys.CURRENT_AGENT] = AgentType.SCHEDULER
+                # Start formatting now so it overlaps with the node
+                # transition instead of running serially in present_slots
+                state[StateKeys.FORMAT_TASK] = asyncio.create_task(
+                    self.scheduler.format_slots_message(slots)
+                )
                 logger.info(f"Found {len(slots)} available slots")
             
             return state
@@ -200,7 +247,7 @@ class OrchestratorAgent:
         except Exception as e:
             logger.error(f"Error finding slots: {e}")
             state[StateKeys.AGENT_RESPONSE] = "I encountered an error while searching for appointments. Let me try again."
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR.value
             return state
     
     async def _present_slots_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -212,11 +259,15 @@ class OrchestratorAgent:
         slots = state.get(StateKeys.AVAILABLE_SLOTS, [])
         
         try:
-            # Format slots message
-            message = await self.scheduler.format_slots_message(slots)
-            
+            # Use the message prefetched by find_slots when available
+            format_task = state.pop(StateKeys.FORMAT_TASK, None)
+            if format_task is not None:
+                message = await format_task
+            else:
+                message = await self.scheduler.format_slots_message(slots)
+
             state[StateKeys.AGENT_RESPONSE] = message
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.AWAITING_SELECTION
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.AWAITING_SELECTION.value
             state[StateKeys.SLOT_SELECTION_ATTEMPTS] = 0
             
             return state
@@ -224,7 +275,7 @@ class OrchestratorAgent:
         except Exception as e:
             logger.error(f"Error presenting slots: {e}")
             state[StateKeys.AGENT_RESPONSE] = "I had trouble formatting the available times. Please try again."
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR.value
             return state
     
     async def _await_selection_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -233,7 +284,7 @@ class OrchestratorAgent:
         """
         logger.info("Node: Awaiting slot selection")
         
-        user_message = state.get(StateKeys.USER_MESSAGE, "").lower().strip()
+        user_message = state.get(StateKeys.USER_MESSAGE_NORM, "")
         slots = state.get(StateKeys.AVAILABLE_SLOTS, [])
         attempts = state.get(StateKeys.SLOT_SELECTION_ATTEMPTS, 0)
         
@@ -242,7 +293,7 @@ class OrchestratorAgent:
         
         if selected_slot:
             state[StateKeys.SELECTED_SLOT] = selected_slot
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.CONFIRMING
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.CONFIRMING.value
             state[StateKeys.CURRENT_AGENT] = AgentType.CONFIRMATION
             logger.info(f"Slot selected: {selected_slot}")
         else:
@@ -251,10 +302,10 @@ class OrchestratorAgent:
             
             if attempts >= self.MAX_SLOT_SELECTION_ATTEMPTS:
                 state[StateKeys.AGENT_RESPONSE] = "I'm having trouble understanding your selection. Let me show you the available slots again."
-                state[StateKeys.WORKFLOW_STATE] = WorkflowState.PRESENTING_SLOTS
+                state[StateKeys.WORKFLOW_STATE] = WorkflowState.PRESENTING_SLOTS.value
             else:
                 state[StateKeys.AGENT_RESPONSE] = error_message or "Please select a slot by entering its number (e.g., 1, 2, 3)."
-                state[StateKeys.WORKFLOW_STATE] = WorkflowState.AWAITING_SELECTION
+                state[StateKeys.WORKFLOW_STATE] = WorkflowState.AWAITING_SELECTION.value
         
         return state
     
@@ -269,13 +320,13 @@ class OrchestratorAgent:
         
         try:
             # Create confirmation message
-            message = await self.confirmation.create_confirmation_message(
+            message = self.confirmation.create_confirmation_message(
                 patient_info=patient_info,
                 selected_slot=selected_slot
             )
             
             state[StateKeys.AGENT_RESPONSE] = message
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.CONFIRMING
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.CONFIRMING.value
             state[StateKeys.AWAITING_CONFIRMATION] = True
             state[StateKeys.CURRENT_AGENT] = AgentType.CONFIRMATION
             
@@ -284,7 +335,7 @@ class OrchestratorAgent:
         except Exception as e:
             logger.error(f"Error in confirm_node: {e}")
             state[StateKeys.AGENT_RESPONSE] = "I had trouble preparing the confirmation. Please try again."
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR.value
             return state
     
     async def _finalize_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -293,8 +344,8 @@ class OrchestratorAgent:
         """
         logger.info("Node: Finalizing appointment")
         
-        user_message = state.get(StateKeys.USER_MESSAGE, "").lower().strip()
-        
+        user_message = state.get(StateKeys.USER_MESSAGE_NORM, "")
+
         # Check for confirmation
         is_confirmed = self._is_confirmation(user_message)
         is_rejected = self._is_rejection(user_message)
@@ -308,27 +359,27 @@ class OrchestratorAgent:
                 )
                 
                 if result and result.get("appointment_id"):
-                    message = await self.confirmation.create_success_message(result)
+                    message = self.confirmation.create_success_message(result)
                     state[StateKeys.AGENT_RESPONSE] = message
-                    state[StateKeys.WORKFLOW_STATE] = WorkflowState.COMPLETED
+                    state[StateKeys.WORKFLOW_STATE] = WorkflowState.COMPLETED.value
                     state[StateKeys.APPOINTMENT_ID] = result["appointment_id"]
                     logger.info(f"Appointment finalized: {result['appointment_id']}")
                 else:
                     state[StateKeys.AGENT_RESPONSE] = "I'm sorry, there was an error creating your appointment. Please try again or contact support."
-                    state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR
+                    state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR.value
                 
             except Exception as e:
                 logger.error(f"Error finalizing appointment: {e}")
                 state[StateKeys.AGENT_RESPONSE] = "An error occurred while booking your appointment. Please try again."
-                state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR
+                state[StateKeys.WORKFLOW_STATE] = WorkflowState.ERROR.value
                 
         elif is_rejected:
             state[StateKeys.AGENT_RESPONSE] = "No problem! Would you like to select a different time slot?"
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.AWAITING_SELECTION
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.AWAITING_SELECTION.value
             state[StateKeys.AWAITING_CONFIRMATION] = False
         else:
             state[StateKeys.AGENT_RESPONSE] = "I didn't catch that. Please reply 'yes' to confirm or 'no' to choose a different time."
-            state[StateKeys.WORKFLOW_STATE] = WorkflowState.CONFIRMING
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.CONFIRMING.value
         
         return state
     
@@ -342,14 +393,14 @@ class OrchestratorAgent:
         if not slots:
             return None, "No slots available to select from."
         
-        # Extract numbers from message
-        numbers = [int(char) for char in user_message if char.isdigit()]
-        
-        if not numbers:
+        # Extract the first number from the message; a single regex scan
+        # also parses multi-digit selections like "10" correctly
+        match = _DIGITS_RE.search(user_message)
+
+        if not match:
             return None, "Please enter the number of the slot you'd like to book."
-        
-        # Take the first number found
-        slot_num = numbers[0] - 1  # Convert to 0-based index
+
+        slot_num = int(match.group()) - 1  # Convert to 0-based index
         
         if 0 <= slot_num < len(slots):
             return slots[slot_num], None
@@ -358,74 +409,37 @@ class OrchestratorAgent:
     
     def _is_confirmation(self, message: str) -> bool:
         """Check if message is a confirmation."""
-        confirmations = ["yes", "confirm", "ok", "sure", "correct", "right", "yep", "yeah", "y"]
-        return any(word in message for word in confirmations)
-    
+        # O(1) set hit for the common single-word reply, regex otherwise
+        return message in _CONFIRM_WORDS or bool(_CONFIRM_RE.search(message))
+
     def _is_rejection(self, message: str) -> bool:
         """Check if message is a rejection."""
-        rejections = ["no", "nope", "cancel", "different", "change", "n"]
-        return any(word in message for word in rejections)
-    
-    # Routing functions for conditional edges
-    
-    def _route_from_gather_info(self, state: Dict[str, Any]) -> str:
-        """Route from info gathering based on completeness."""
-        has_info = state.get(StateKeys.HAS_REQUIRED_INFO, False)
-        workflow_state = state.get(StateKeys.WORKFLOW_STATE)
-        
-        if workflow_state == WorkflowState.ERROR:
-            return END
-        elif has_info:
-            return "find_slots"
-        else:
-            return "gather_info"
-    
-    def _route_from_await_selection(self, state: Dict[str, Any]) -> str:
-        """Route from slot selection based on user choice."""
-        workflow_state = state.get(StateKeys.WORKFLOW_STATE)
-        
-        if workflow_state == WorkflowState.ERROR:
-            return END
-        elif workflow_state == WorkflowState.CONFIRMING:
-            return "confirm"
-        elif workflow_state == WorkflowState.PRESENTING_SLOTS:
-            return "present_slots"
-        else:
-            return "await_selection"
-    
-    def _route_from_confirm(self, state: Dict[str, Any]) -> str:
-        """Route from confirmation based on user response."""
-        workflow_state = state.get(StateKeys.WORKFLOW_STATE)
-        awaiting = state.get(StateKeys.AWAITING_CONFIRMATION, False)
-        
-        if workflow_state == WorkflowState.ERROR:
-            return END
-        elif awaiting and workflow_state == WorkflowState.CONFIRMING:
-            return "finalize"
-        elif workflow_state == WorkflowState.AWAITING_SELECTION:
-            return "await_selection"
-        else:
-            return END
-    
+        return message in _REJECT_WORDS or bool(_REJECT_RE.search(message))
+
     async def process_message(
         self,
         user_message: str,
-        conversation_context: Dict[str, Any]
+        conversation_context: Dict[str, Any],
+        on_token=None
     ) -> Dict[str, Any]:
         """
         Process a user message through the workflow.
-        
+
         Args:
             user_message: User's message
             conversation_context: Current conversation context
-            
+            on_token: Optional async callback receiving response chunks
+                as the LLM streams them, for token-level UIs
+
         Returns:
             Updated state with agent response
         """
         try:
             # Initialize state from conversation context
             state = self._initialize_state(user_message, conversation_context)
-            
+            if on_token is not None:
+                state[StateKeys.ON_TOKEN] = on_token
+
             # Route to appropriate node based on current workflow state
             result = await self._route_and_process(state)
             
@@ -439,51 +453,106 @@ class OrchestratorAgent:
         except Exception as e:
             logger.error(f"Error in orchestrator.process_message: {e}", exc_info=True)
             return self._create_error_state(str(e))
-    
+
+    async def process_messages_batch(
+        self,
+        sessions: Dict[str, Tuple[List[str], Dict[str, Any]]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Process batches of messages across multiple sessions concurrently.
+
+        Useful for replay/import workloads (re-running recorded
+        conversations, ingesting SMS backlogs) where processing sessions
+        one at a time leaves the LLM provider idle between turns.
+        Messages within a session stay sequential since each turn's
+        state feeds the next; sessions fan out via asyncio.gather.
+
+        Args:
+            sessions: Mapping of session id to (messages, initial context)
+
+        Returns:
+            Mapping of session id to the list of per-message result states
+        """
+        semaphore = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+
+        async def run_session(messages: List[str], context: Dict[str, Any]):
+            async with semaphore:
+                results = []
+                for message in messages:
+                    result = await self.process_message(message, context)
+                    # Each turn's output state is the next turn's context
+                    context = result
+                    results.append(result)
+                return results
+
+        session_ids = list(sessions)
+        tasks = [
+            asyncio.create_task(run_session(*sessions[session_id]))
+            for session_id in session_ids
+        ]
+        gathered = await asyncio.gather(*tasks, return_exceptions=True)
+
+        results_by_session = {}
+        for session_id, result in zip(session_ids, gathered):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing session {session_id}: {result}")
+                results_by_session[session_id] = [self._create_error_state(str(result))]
+            else:
+                results_by_session[session_id] = result
+
+        return results_by_session
+
     def _initialize_state(self, user_message: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Initialize state from user message and conversation context."""
-        return {
-            StateKeys.USER_MESSAGE: user_message,
-            StateKeys.CONVERSATION_HISTORY: context.get(StateKeys.CONVERSATION_HISTORY, []),
-            StateKeys.PATIENT_INFO: context.get(StateKeys.PATIENT_INFO, {}),
-            StateKeys.AVAILABLE_SLOTS: context.get(StateKeys.AVAILABLE_SLOTS, []),
-            StateKeys.SELECTED_SLOT: context.get(StateKeys.SELECTED_SLOT),
-            StateKeys.WORKFLOW_STATE: context.get(StateKeys.WORKFLOW_STATE, WorkflowState.START),
-            StateKeys.CURRENT_AGENT: context.get(StateKeys.CURRENT_AGENT, AgentType.RECEPTIONIST),
-            StateKeys.HAS_REQUIRED_INFO: context.get(StateKeys.HAS_REQUIRED_INFO, False),
-            StateKeys.AWAITING_CONFIRMATION: context.get(StateKeys.AWAITING_CONFIRMATION, False),
-            StateKeys.SLOT_SELECTION_ATTEMPTS: context.get(StateKeys.SLOT_SELECTION_ATTEMPTS, 0)
-        }
+        # Shallow-copy the context and only fill in missing defaults
+        # rather than rebuilding the full dict with ten .get() calls
+        state = dict(context)
+        state[StateKeys.USER_MESSAGE] = user_message
+        # Normalize once here; the selection/finalize nodes and the
+        # confirm/reject matchers all read this instead of re-lowering
+        state[StateKeys.USER_MESSAGE_NORM] = user_message.lower().strip()
+        state.setdefault(StateKeys.CONVERSATION_HISTORY, [])
+        state.setdefault(StateKeys.PATIENT_INFO, {})
+        state.setdefault(StateKeys.AVAILABLE_SLOTS, [])
+        state.setdefault(StateKeys.SELECTED_SLOT, None)
+        if state.get(StateKeys.WORKFLOW_STATE) is None:
+            state[StateKeys.WORKFLOW_STATE] = WorkflowState.START.value
+        if state.get(StateKeys.CURRENT_AGENT) is None:
+            state[StateKeys.CURRENT_AGENT] = AgentType.RECEPTIONIST
+        state.setdefault(StateKeys.HAS_REQUIRED_INFO, False)
+        state.setdefault(StateKeys.AWAITING_CONFIRMATION, False)
+        state.setdefault(StateKeys.SLOT_SELECTION_ATTEMPTS, 0)
+        return state
     
     async def _route_and_process(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Route to appropriate node and process based on current workflow state."""
         current_state = state.get(StateKeys.WORKFLOW_STATE)
         
         # State transition logic
-        if current_state in [WorkflowState.START, WorkflowState.GATHERING_INFO]:
+        if current_state in (_WS_START, _WS_GATHERING):
             result = await self._gather_info_node(state)
             
             # If we have required info, automatically find and present slots
             if result.get(StateKeys.HAS_REQUIRED_INFO):
                 result = await self._find_slots_node(result)
-                if result.get(StateKeys.WORKFLOW_STATE) == WorkflowState.PRESENTING_SLOTS:
+                if result.get(StateKeys.WORKFLOW_STATE) == _WS_PRESENTING:
                     result = await self._present_slots_node(result)
             
             return result
             
-        elif current_state == WorkflowState.AWAITING_SELECTION:
+        elif current_state == _WS_AWAITING:
             result = await self._await_selection_node(state)
             
             # If slot selected, move to confirmation
-            if result.get(StateKeys.WORKFLOW_STATE) == WorkflowState.CONFIRMING:
+            if result.get(StateKeys.WORKFLOW_STATE) == _WS_CONFIRMING:
                 result = await self._confirm_node(result)
             
             return result
             
-        elif current_state == WorkflowState.CONFIRMING:
+        elif current_state == _WS_CONFIRMING:
             return await self._finalize_node(state)
             
-        elif current_state == WorkflowState.COMPLETED:
+        elif current_state == _WS_COMPLETED:
             return {
                 **state,
                 StateKeys.AGENT_RESPONSE: "Your appointment has been confirmed! Is there anything else I can help you with?"
@@ -497,7 +566,7 @@ class OrchestratorAgent:
         """Create an error state with reset to beginning."""
         return {
             StateKeys.AGENT_RESPONSE: "I apologize, but I encountered an error. Let's start over. What can I help you with today?",
-            StateKeys.WORKFLOW_STATE: WorkflowState.START,
+            StateKeys.WORKFLOW_STATE: WorkflowState.START.value,
             StateKeys.CURRENT_AGENT: AgentType.RECEPTIONIST,
             StateKeys.ERROR: error_message,
             StateKeys.HAS_REQUIRED_INFO: False,
@@ -524,4 +593,7 @@ class OrchestratorAgent:
             
         except Exception as e:
             logger.error(f"Error starting conversation: {e}")
-            return "Hello! Welcome to BookaDoc. How can I help you today?"
\ No newline at end of file
+            return "Hello! Welcome to BookaDoc. How can I help you today?"
+
+# Create singleton instance
+orchestrator_agent = OrchestratorAgent()
@@ -1,10 +1,41 @@
-from typing import Dict, Any, Optional
-import json
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import orjson
+import re
 from app.agents.base_agent import BaseAgent
 from app.utils.logger import app_logger as logger
 
 
+# Fields that are trivially extractable without an LLM call
+_PHONE_RE = re.compile(r"\b\d{10}\b")
+_TIME_RE = re.compile(r"\b(morning|afternoon|evening)\b", re.IGNORECASE)
+_DATE_RE = re.compile(
+    r"\b(today|tomorrow|mon|tue|wed|thu|fri|sat|sun|\d{1,2}[/-]\d{1,2})\b",
+    re.IGNORECASE
+)
+
+# Pulls the JSON object out of a fenced code block in one scan
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.S)
+
+
 class ReceptionistAgent(BaseAgent):
+
+    # Max cached extraction results before oldest entries are evicted
+    EXTRACTION_CACHE_SIZE = 512
+
+    # Summarize older turns once history passes this length, keeping the
+    # last SUMMARY_WINDOW messages verbatim
+    SUMMARY_TRIGGER = 12
+    SUMMARY_WINDOW = 6
+
+    # Max conversations with a cached rolling summary before oldest
+    # entries are evicted
+    SUMMARY_CACHE_SIZE = 256
+
+    # Built once instead of per has_required_info call
+    _REQUIRED_FIELDS = ("patient_name", "patient_phone", "reason")
+    _EMPTY_SENTINELS = frozenset(("null", "", None))
+
     def __init__(self):
         system_prompt = """You are a friendly and professional medical receptionist at BookaDoc clinic.
 
@@ -23,22 +54,76 @@ Format your final response with: "READY_TO_SCHEDULE" when all required info is c
  READY_TO_SCHEDULE"
 """
         super().__init__(name="Receptionist", system_prompt=system_prompt)
-    
+        # Re-entering gather_info with identical history (retries, error
+        # loops, repeated messages) replays the parsed result from here
+        self._extraction_cache: OrderedDict[tuple, Dict[str, Any]] = OrderedDict()
+        # Rolling summaries of older turns so prompt size stays bounded,
+        # keyed per conversation: this agent is a process-wide singleton,
+        # so a single shared summary would leak one caller's details
+        # (name, phone, reason) into every other caller's prompt
+        self._summaries: OrderedDict[str, Tuple[str, int]] = OrderedDict()
+
+    def _regex_extract(self, message: str) -> Dict[str, Any]:
+        """Pull out the trivially-parseable fields without the LLM."""
+        extracted = {}
+
+        phone = _PHONE_RE.search(message)
+        if phone:
+            extracted["patient_phone"] = phone.group()
+
+        time_pref = _TIME_RE.search(message)
+        if time_pref:
+            extracted["preferred_time"] = time_pref.group().lower()
+
+        date_pref = _DATE_RE.search(message)
+        if date_pref:
+            extracted["preferred_date"] = date_pref.group().lower()
+
+        return extracted
+
     async def extract_information(
         self,
         conversation_history: list,
-        latest_message: str
+        latest_message: str,
+        current_info: Optional[Dict[str, Any]] = None,
+        conversation_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Extract structured information from conversation.
-        
+
         Args:
             conversation_history: Previous messages
             latest_message: Latest user message
-            
+            current_info: Already-collected patient info, used to skip
+                the LLM when only regex-extractable fields remain
+            conversation_id: Key for the rolling summary of this
+                conversation; without it long histories are sent in full
+
         Returns:
             Extracted information dictionary
         """
+        # Phone numbers and time/date preferences fall out of a regex;
+        # skip the LLM entirely when the free-form fields are known
+        regex_extracted = self._regex_extract(latest_message)
+        if (
+            current_info
+            and current_info.get("patient_name")
+            and current_info.get("reason")
+        ):
+            return regex_extracted
+
+        await self._maybe_summarize(conversation_history, conversation_id)
+
+        cache_key = (
+            latest_message,
+            tuple((msg.get("role"), msg.get("content")) for msg in conversation_history)
+        )
+        cached = self._extraction_cache.get(cache_key)
+        if cached is not None:
+            self._extraction_cache.move_to_end(cache_key)
+            logger.info("Extraction cache hit")
+            return cached
+
         extraction_prompt = f"""Extract the following information from the conversation:
 - patient_name: Full name of the patient
 - patient_phone: Phone number (10 digits)
@@ -48,7 +133,7 @@ Format your final response with: "READY_TO_SCHEDULE" when all required info is c
 - preferred_time: Time preference like "morning", "afternoon", "evening" (or null)
 
 Conversation:
-{self._format_conversation(conversation_history)}
+{self._format_conversation(conversation_history, conversation_id)}
 
 Latest message: {latest_message}
 
@@ -57,41 +142,105 @@ Example: {{"patient_name": "John Doe", "patient_phone": "9876543210", "reason":
 """
         
         try:
-            messages = [{"role": "user", "content": extraction_prompt}]
             response = await self.llm.ainvoke([
                 {"role": "user", "content": extraction_prompt}
             ])
             
             # Parse JSON response
             content = response.content.strip()
-            
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-            
-            extracted = json.loads(content)
+
+            fenced = _JSON_BLOCK_RE.search(content)
+            if fenced:
+                content = fenced.group(1)
+
+            extracted = orjson.loads(content)
+
+            # Backfill anything the model missed with the regex hits
+            for key, value in regex_extracted.items():
+                if not extracted.get(key):
+                    extracted[key] = value
+
             logger.info(f"Extracted info: {extracted}")
+
+            self._extraction_cache[cache_key] = extracted
+            if len(self._extraction_cache) > self.EXTRACTION_CACHE_SIZE:
+                self._extraction_cache.popitem(last=False)
+
             return extracted
             
         except Exception as e:
             logger.error(f"Error extracting information: {e}")
-            return {}
+            return regex_extracted
     
-    def _format_conversation(self, conversation_history: list) -> str:
+    async def _maybe_summarize(
+        self,
+        conversation_history: list,
+        conversation_id: Optional[str]
+    ):
+        """Compress older turns into a short summary once the history
+        grows past SUMMARY_TRIGGER, so extraction prompts stay bounded
+        instead of re-sending the full transcript every turn."""
+        if conversation_id is None:
+            return
+        if len(conversation_history) <= self.SUMMARY_TRIGGER:
+            return
+
+        prefix = conversation_history[:-self.SUMMARY_WINDOW]
+        _, summarized_upto = self._summaries.get(conversation_id, (None, 0))
+        if len(prefix) <= summarized_upto:
+            return
+
+        transcript = "\n".join(
+            f"{'Patient' if msg.get('role') == 'user' else 'Receptionist'}: {msg.get('content', '')}"
+            for msg in prefix
+        )
+
+        try:
+            response = await self.llm.ainvoke([{
+                "role": "user",
+                "content": (
+                    "Summarize this appointment-booking conversation in at "
+                    "most 200 tokens, keeping every patient detail (name, "
+                    f"phone, reason, preferences):\n\n{transcript}"
+                )
+            }])
+            self._summaries[conversation_id] = (response.content.strip(), len(prefix))
+            self._summaries.move_to_end(conversation_id)
+            if len(self._summaries) > self.SUMMARY_CACHE_SIZE:
+                self._summaries.popitem(last=False)
+            logger.info(f"Summarized {len(prefix)} conversation turns")
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {e}")
+
+    def _format_conversation(
+        self,
+        conversation_history: list,
+        conversation_id: Optional[str] = None
+    ) -> str:
         """Format conversation history for extraction."""
-        formatted = []
-        for msg in conversation_history:
-            role = "Patient" if msg.get("role") == "user" else "Receptionist"
-            formatted.append(f"{role}: {msg.get('content', '')}")
-        return "\n".join(formatted)
+        summary = None
+        if conversation_id is not None:
+            summary, _ = self._summaries.get(conversation_id, (None, 0))
+
+        if summary and len(conversation_history) > self.SUMMARY_TRIGGER:
+            tail = conversation_history[-self.SUMMARY_WINDOW:]
+            return f"[Earlier summary]\n{summary}\n" + "\n".join(
+                f"{'Patient' if msg.get('role') == 'user' else 'Receptionist'}: {msg.get('content', '')}"
+                for msg in tail
+            )
+
+        return "\n".join(
+            f"{'Patient' if msg.get('role') == 'user' else 'Receptionist'}: {msg.get('content', '')}"
+            for msg in conversation_history
+        )
     
     def has_required_info(self, extracted_info: Dict[str, Any]) -> bool:
-        required_fields = ["patient_name", "patient_phone", "reason"]
-    
-    # Check only required ones for completeness
-        for field in required_fields:
-            value = extracted_info.get(field)
-            if not value or value in ["null", None, ""]:
-                return False
-        return True
+        # Check only required ones for completeness; generator stops at
+        # the first missing field
+        return all(
+            extracted_info.get(field) not in self._EMPTY_SENTINELS
+            for field in self._REQUIRED_FIELDS
+        )
+
+# Create singleton instance
+receptionist_agent = ReceptionistAgent()
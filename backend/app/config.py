@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Tuple
+from functools import cached_property
 import os
 
 
@@ -22,10 +23,10 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
     
-    @property
-    def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins into a list."""
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+    @cached_property
+    def cors_origins_list(self) -> Tuple[str, ...]:
+        """CORS origins parsed once; later accesses reuse the tuple."""
+        return tuple(origin.strip() for origin in self.CORS_ORIGINS.split(","))
     
     # LLM Configuration
     ANTHROPIC_API_KEY: str = ""
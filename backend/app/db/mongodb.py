@@ -1,3 +1,5 @@
+import asyncio
+
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure
 from app.config import settings
@@ -53,20 +55,32 @@ async def create_indexes():
         return
     
     try:
-        # Appointments indexes
-        await database.appointments.create_index("patient_phone")
-        await database.appointments.create_index("appointment_date")
-        await database.appointments.create_index("doctor_id")
-        await database.appointments.create_index([("doctor_id", 1), ("appointment_date", 1)])
-        
-        # Doctors indexes
-        await database.doctors.create_index("specialization")
-        await database.doctors.create_index("is_active")
-        await database.doctors.create_index("doctor_id", unique=True)  # ADDED: Unique constraint
-        
-        # Conversations indexes
-        await database.conversations.create_index("created_at")
-        
+        # All index builds issued concurrently — startup waits one
+        # round trip instead of one per index — and with background=True
+        # so an initial build on a populated collection doesn't block
+        # the server. create_index is a no-op for indexes that already
+        # exist, which keeps this idempotent across restarts.
+        await asyncio.gather(
+            # Appointments indexes
+            database.appointments.create_index("patient_phone", background=True),
+            database.appointments.create_index("appointment_date", background=True),
+            database.appointments.create_index("doctor_id", background=True),
+            database.appointments.create_index([("doctor_id", 1), ("appointment_date", 1)], background=True),
+            # Compound indexes matching query_appointments' filter shapes so
+            # date ranges resolve as B-tree range scans after an equality seek
+            database.appointments.create_index([("status", 1), ("appointment_date", 1)], background=True),
+            database.appointments.create_index([("patient_phone", 1), ("appointment_date", 1)], background=True),
+            database.appointments.create_index([("appointment_date", 1), ("status", 1)], background=True),
+
+            # Doctors indexes
+            database.doctors.create_index("specialization", background=True),
+            database.doctors.create_index("is_active", background=True),
+            database.doctors.create_index("doctor_id", unique=True, background=True),
+
+            # Conversations indexes
+            database.conversations.create_index("created_at", background=True)
+        )
+
         logger.info("MongoDB indexes created")
     except Exception as e:
         logger.warning(f"Error creating indexes: {e}")
@@ -1,11 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.utils.logger import app_logger as logger
 from app.api import api_router, ws_router
-from app.db.mongodb import connect_to_mongo, close_mongo_connection
+from app.db.mongodb import connect_to_mongo, close_mongo_connection, get_database
 from app.services.doctor_service import doctor_service
 
 
@@ -27,10 +28,16 @@ async def lifespan(app: FastAPI):
         
         if success:
             logger.info("✅ Doctors initialized successfully")
-            
+
             # Verify doctors
             doctors = await doctor_service.get_all_doctors()
             logger.info(f"✅ Found {len(doctors)} doctors in database")
+
+            # Warm the lookup indexes and the fallback doctor now, so
+            # the first preference-less booking doesn't pay the build
+            default_doctor = await doctor_service.resolve_doctor()
+            if default_doctor:
+                logger.info(f"✅ Default fallback doctor: Dr. {default_doctor.name}")
         else:
             logger.warning("⚠️  Failed to initialize doctors")
         
@@ -59,12 +66,15 @@ async def lifespan(app: FastAPI):
     await close_mongo_connection()
 
 
-# Initialize FastAPI app
+# Initialize FastAPI app; orjson serializes every JSON response in C,
+# including datetime/date fields — this covers /, /health and every
+# api_router endpoint that doesn't return an explicit Response
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -95,8 +105,6 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    from app.db.mongodb import get_database
-    
     db = get_database()
     db_status = "disconnected"
     doctors_count = 0
@@ -123,10 +131,21 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    
+
+    # uvloop + httptools + websockets come with uvicorn[standard]. The
+    # access log costs a logging-formatter call per request, so it stays
+    # on only in debug. Single worker on purpose: conversations, their
+    # locks and the slot/availability caches are per-process, so until
+    # that state moves to a shared store (e.g. Redis), extra workers
+    # would route requests for one conversation to different processes.
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        access_log=settings.DEBUG,
+        workers=1
     )
\ No newline at end of file
@@ -2,7 +2,7 @@ from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime, date, time
 from enum import Enum
-import uuid
+import secrets
 
 
 class AppointmentStatus(str, Enum):
@@ -28,7 +28,9 @@ class AppointmentRequest(BaseModel):
 
 class AppointmentSlot(BaseModel):
     """Available appointment time slot."""
-    slot_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    # token_hex over uuid4: same entropy and opacity without building a
+    # UUID object per slot, and slots are generated dozens at a time
+    slot_id: str = Field(default_factory=lambda: secrets.token_hex(16))
     date: date
     start_time: time
     end_time: time
@@ -42,7 +44,7 @@ class AppointmentSlot(BaseModel):
 
 class Appointment(BaseModel):
     """Complete appointment record."""
-    appointment_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    appointment_id: str = Field(default_factory=lambda: secrets.token_hex(16))
     
     patient_name: str
     patient_phone: str
@@ -66,14 +68,11 @@ class Appointment(BaseModel):
     
     # Notes
     notes: Optional[str] = None
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat(),
-            date: lambda v: v.isoformat(),
-            time: lambda v: v.isoformat()
-        }
-    
+
+    # No json_encoders config: pydantic-core serializes datetime/date/
+    # time to ISO-8601 in Rust, and the v1-style per-field Python
+    # callbacks only slowed that down
+
     def to_readable_string(self) -> str:
         """Convert appointment to human-readable string."""
         return (
@@ -1,8 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Optional, List, Dict, Any, ClassVar, Deque
+from collections import deque
 from datetime import datetime
 from enum import Enum
-import uuid
+import secrets
 
 
 class AgentType(str, Enum):
@@ -16,17 +17,14 @@ class AgentType(str, Enum):
 
 class ConversationMessage(BaseModel):
     """Single message in a conversation."""
-    message_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    # token_hex skips the UUID object construction; one message is
+    # created per user/agent turn, so this is a hot default
+    message_id: str = Field(default_factory=lambda: secrets.token_hex(16))
     role: str  # "user", "assistant", "system"
     content: str
     agent_type: Optional[AgentType] = None
     timestamp: datetime = Field(default_factory=datetime.now)
     metadata: Optional[Dict[str, Any]] = None
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class ConversationState(str, Enum):
@@ -42,14 +40,25 @@ class ConversationState(str, Enum):
 
 class ConversationContext(BaseModel):
     """Complete conversation context and state."""
-    conversation_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    
+
+    # Oldest messages roll off past this bound so a long-lived socket
+    # can't grow the context without limit
+    MAX_MESSAGES: ClassVar[int] = 200
+
+    conversation_id: str = Field(default_factory=lambda: secrets.token_hex(16))
+
     # State
     state: ConversationState = ConversationState.INITIATED
     current_agent: AgentType = AgentType.RECEPTIONIST
-    
+
     # Messages
-    messages: List[ConversationMessage] = []
+    messages: Deque[ConversationMessage] = Field(
+        default_factory=lambda: deque(maxlen=ConversationContext.MAX_MESSAGES)
+    )
+
+    # Rendered history memoized between adds, so repeated reads within
+    # a turn don't rebuild the full list of dicts
+    _history_cache: Optional[List[Dict[str, str]]] = PrivateAttr(default=None)
     
     # Extracted Information
     patient_name: Optional[str] = None
@@ -75,12 +84,10 @@ class ConversationContext(BaseModel):
     attempt_count: int = 0
     error_count: int = 0
     last_error: Optional[str] = None
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-    
+
+    # datetime fields serialize to ISO-8601 in pydantic-core (Rust);
+    # the old v1-style json_encoders forced that back into Python
+
     def add_message(self, role: str, content: str, agent_type: Optional[AgentType] = None):
         """Add a message to the conversation."""
         message = ConversationMessage(
@@ -89,18 +96,26 @@ class ConversationContext(BaseModel):
             agent_type=agent_type or self.current_agent
         )
         self.messages.append(message)
+        self._history_cache = None
         self.updated_at = datetime.now()
         return message
-    
+
+    def clear_messages(self):
+        """Drop all messages (conversation reset)."""
+        self.messages.clear()
+        self._history_cache = None
+
     def get_conversation_history(self) -> List[Dict[str, str]]:
         """Get conversation history in simple format for LLM."""
-        return [
-            {
-                "role": msg.role,
-                "content": msg.content
-            }
-            for msg in self.messages
-        ]
+        if self._history_cache is None:
+            self._history_cache = [
+                {
+                    "role": msg.role,
+                    "content": msg.content
+                }
+                for msg in self.messages
+            ]
+        return self._history_cache
     
     def has_required_info(self) -> bool:
         """Check if all required information is collected."""
@@ -122,15 +137,29 @@ class ConversationContext(BaseModel):
             "doctor_preference": self.doctor_preference
         }
 
+    def to_orchestrator_context(self, workflow_state: Any) -> Dict[str, Any]:
+        """Build the orchestrator input dict for the current turn.
+
+        has_required_info() is evaluated once here and passed along as a
+        plain bool, so downstream consumers read the cached result
+        instead of re-checking the fields.
+        """
+        return {
+            "conversation_id": self.conversation_id,
+            "messages": self.get_conversation_history(),
+            "patient_info": self.to_appointment_request(),
+            "available_slots": self.proposed_slots,
+            "selected_slot": None,  # Set during workflow
+            "workflow_state": workflow_state,
+            "current_agent": self.current_agent,
+            "has_required_info": self.has_required_info(),
+            "awaiting_confirmation": self.state == ConversationState.CONFIRMING
+        }
+
 
 class WebSocketMessage(BaseModel):
     """WebSocket message format."""
     type: str  # "user_message", "agent_message", "status_update", "slot_proposal", "confirmation"
     conversation_id: str
     data: Dict[str, Any]
-    timestamp: datetime = Field(default_factory=datetime.now)
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+    timestamp: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from enum import Enum
-import uuid
+import secrets
 
 
 class Specialization(str, Enum):
@@ -27,7 +27,7 @@ class DoctorAvailability(BaseModel):
 
 
 class Doctor(BaseModel):
-    doctor_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    doctor_id: str = Field(default_factory=lambda: secrets.token_hex(16))
     name: str = Field(..., min_length=2, max_length=100)
     specialization: Specialization
     qualification: str  # e.g., "MBBS, MD"
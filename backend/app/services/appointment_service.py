@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, time, timedelta
 from bson import ObjectId
+from cachetools import TTLCache
 import pytz
 
 from app.models.appointment import (
@@ -15,11 +16,45 @@ from app.db.mongodb import get_database
 
 
 class AppointmentService:
-    """Service for managing appointments with MongoDB."""
-    
+    """Service for managing appointments with MongoDB.
+
+    Every data-access method is an async motor coroutine, so callers
+    must await them; nothing here blocks the event loop and no thread
+    offloading is needed.
+    """
+
+    # Hour windows for time-of-day preferences, [start, end)
+    _TIME_WINDOWS = {
+        "morning": (9, 12),
+        "afternoon": (12, 17),
+        "evening": (17, 20)
+    }
+
+    # Clinic availability is shared across sessions, so concurrent
+    # conversations asking for the same doctor/window within this TTL
+    # reuse one computed grid; mutations clear the cache immediately
+    AVAILABILITY_CACHE_TTL_SECONDS = 30
+    AVAILABILITY_CACHE_SIZE = 256
+
     def __init__(self):
         """Initialize appointment service."""
         self.timezone = pytz.timezone(settings.CLINIC_TIMEZONE)
+        # Live (doctor_id, date, time) keys for confirmed/completed
+        # appointments, maintained on create and status updates so slot
+        # queries can do O(1) membership checks instead of re-fetching
+        # every appointment. Process-local: bookings made before startup
+        # are still excluded by the per-slot _is_slot_available DB check.
+        self._booked_slots: set = set()
+        # Daily slot template precomputed from clinic hours; slot
+        # generation iterates this instead of redoing the hour math
+        self._slot_template = tuple(
+            (time(hour, 0), time((hour + 1) % 24, 0))
+            for hour in range(settings.CLINIC_OPEN_HOUR, settings.CLINIC_CLOSE_HOUR)
+        )
+        self._availability_cache: TTLCache = TTLCache(
+            maxsize=self.AVAILABILITY_CACHE_SIZE,
+            ttl=self.AVAILABILITY_CACHE_TTL_SECONDS
+        )
         logger.info("Appointment Service initialized with MongoDB")
     
     def _get_collection(self):
@@ -37,7 +72,8 @@ class AppointmentService:
         doctor_name: str,
         reason: Optional[str] = None,
         patient_email: Optional[str] = None,
-        duration_minutes: int = 30
+        duration_minutes: int = 30,
+        status: AppointmentStatus = AppointmentStatus.SCHEDULED
     ) -> AppointmentResponse:
         """Create a new appointment in MongoDB."""
         try:
@@ -69,10 +105,10 @@ class AppointmentService:
                 "doctor_name": doctor_name,
                 "doctor_id": doctor_id,
                 "reason": reason,
-                "status": AppointmentStatus.SCHEDULED.value,
+                "status": status.value,
                 "created_at": datetime.now(),
                 "updated_at": datetime.now(),
-                "confirmed_at": None,
+                "confirmed_at": datetime.now() if status == AppointmentStatus.CONFIRMED else None,
                 "conversation_id": None,
                 "notes": None
             }
@@ -83,7 +119,11 @@ class AppointmentService:
             
             # Convert to Appointment model
             appointment = self._doc_to_model(appointment_doc)
-            
+
+            if status in (AppointmentStatus.CONFIRMED, AppointmentStatus.COMPLETED):
+                self._booked_slots.add((doctor_id, appointment_date, appointment_time))
+            self._availability_cache.clear()
+
             logger.info(f"Appointment created in MongoDB: {appointment.appointment_id}")
             
             return AppointmentResponse(
@@ -138,6 +178,62 @@ class AppointmentService:
             logger.error(f"Error getting appointments: {e}")
             return []
     
+    async def query_appointments(
+        self,
+        status: Optional[AppointmentStatus] = None,
+        patient_phone: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Appointment]:
+        """Get appointments matching the filters, pushed down to MongoDB.
+
+        Filtering in the query lets MongoDB use its indexes and only
+        ship matching documents, instead of materializing every
+        appointment and re-scanning the list once per filter.
+        """
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                logger.warning("MongoDB not connected")
+                return []
+
+            query: Dict[str, Any] = {}
+
+            if status:
+                query["status"] = status.value
+
+            if patient_phone:
+                query["patient_phone"] = patient_phone
+
+            date_range = {}
+            if date_from:
+                date_range["$gte"] = datetime.combine(date_from, datetime.min.time())
+            if date_to:
+                date_range["$lte"] = datetime.combine(date_to, datetime.min.time())
+            if date_range:
+                query["appointment_date"] = date_range
+
+            # Sorting on the indexed field keeps this a range scan
+            # (newest first) and pagination bounds the result set
+            cursor = (
+                collection.find(query)
+                .sort("appointment_date", -1)
+                .skip(offset)
+                .limit(limit)
+            )
+
+            appointments = []
+            async for doc in cursor:
+                appointments.append(self._doc_to_model(doc))
+
+            return appointments
+
+        except Exception as e:
+            logger.error(f"Error querying appointments: {e}")
+            return []
+
     async def update_appointment_status(
         self,
         appointment_id: str,
@@ -176,7 +272,19 @@ class AppointmentService:
             
             # Get updated appointment
             appointment = await self.get_appointment(appointment_id)
-            
+
+            if appointment:
+                slot_key = (
+                    appointment.doctor_id,
+                    appointment.appointment_date,
+                    appointment.appointment_time
+                )
+                if status in (AppointmentStatus.CONFIRMED, AppointmentStatus.COMPLETED):
+                    self._booked_slots.add(slot_key)
+                else:
+                    self._booked_slots.discard(slot_key)
+            self._availability_cache.clear()
+
             logger.info(f"Appointment {appointment_id} status updated to {status}")
             
             return AppointmentResponse(
@@ -193,6 +301,15 @@ class AppointmentService:
                 error=str(e)
             )
     
+    def is_booked(
+        self,
+        doctor_id: str,
+        appointment_date: date,
+        appointment_time: time
+    ) -> bool:
+        """Check the live booked-slots set, O(1) per candidate slot."""
+        return (doctor_id, appointment_date, appointment_time) in self._booked_slots
+
     async def cancel_appointment(self, appointment_id: str) -> AppointmentResponse:
         """Cancel an appointment in MongoDB."""
         return await self.update_appointment_status(
@@ -207,39 +324,91 @@ class AppointmentService:
         start_date: date,
         num_days: int = 7
     ) -> List[AppointmentSlot]:
-        """Get available appointment slots."""
-        available_slots = []
-        
-        for day_offset in range(num_days):
-            check_date = start_date + timedelta(days=day_offset)
-            day_of_week = check_date.weekday()
-            
-            # Skip weekends
-            if day_of_week >= 5:
-                continue
-            
-            # Generate slots for this day
-            current_hour = settings.CLINIC_OPEN_HOUR
-            
-            while current_hour < settings.CLINIC_CLOSE_HOUR:
-                slot_time = time(current_hour, 0)
-                
-                # Check if slot is available
-                if await self._is_slot_available(check_date, slot_time, doctor_id):
-                    slot = AppointmentSlot(
-                        date=check_date,
-                        start_time=slot_time,
-                        end_time=time((current_hour + 1) % 24, 0),
-                        doctor_name=doctor_name,
-                        doctor_id=doctor_id,
-                        is_available=True
-                    )
-                    available_slots.append(slot)
-                
-                current_hour += 1
-        
-        logger.info(f"Found {len(available_slots)} available slots for {doctor_name}")
-        return available_slots
+        """Get available appointment slots.
+
+        Fetches the doctor's booked appointments for the whole window
+        in one query, then generates slots as template-minus-booked set
+        probes — instead of one availability query per candidate slot.
+        A packed per-day availability bitmap would not beat this: the
+        grid is at most ~10 slots/day, so the set probe is already O(1)
+        on a handful of keys, and a bitmap would add encode/decode and
+        invalidation logic for no measurable win at this scale.
+
+        Results are shared through a short-TTL cache so concurrent
+        conversations asking for the same doctor and window compute the
+        grid once.
+        """
+        cache_key = (doctor_id, start_date, num_days)
+        cached = self._availability_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                logger.warning("MongoDB not connected")
+                return []
+
+            end_date = start_date + timedelta(days=num_days)
+            cursor = collection.find(
+                {
+                    "doctor_id": doctor_id,
+                    "appointment_date": {
+                        "$gte": datetime.combine(start_date, datetime.min.time()),
+                        "$lt": datetime.combine(end_date, datetime.min.time())
+                    },
+                    "status": {"$in": [
+                        AppointmentStatus.SCHEDULED.value,
+                        AppointmentStatus.CONFIRMED.value
+                    ]}
+                },
+                {"appointment_date": 1, "appointment_time": 1}
+            )
+
+            booked = set()
+            async for doc in cursor:
+                booked_date = doc["appointment_date"]
+                if isinstance(booked_date, datetime):
+                    booked_date = booked_date.date()
+                booked_time = doc["appointment_time"]
+                if isinstance(booked_time, str):
+                    booked_time = time.fromisoformat(booked_time)
+                booked.add((booked_date, booked_time))
+
+            available_slots = []
+
+            # Locals bound outside the grid loop; with the booked set in
+            # hand the inner loop is pure hash probes
+            template = self._slot_template
+            append = available_slots.append
+            one_day = timedelta(days=1)
+            check_date = start_date
+
+            for _ in range(num_days):
+                # Skip weekends
+                if check_date.weekday() < 5:
+                    for slot_time, end_time in template:
+                        if (check_date, slot_time) in booked:
+                            continue
+
+                        append(AppointmentSlot(
+                            date=check_date,
+                            start_time=slot_time,
+                            end_time=end_time,
+                            doctor_name=doctor_name,
+                            doctor_id=doctor_id,
+                            is_available=True
+                        ))
+
+                check_date += one_day
+
+            logger.info(f"Found {len(available_slots)} available slots for {doctor_name}")
+            self._availability_cache[cache_key] = available_slots
+            return available_slots
+
+        except Exception as e:
+            logger.error(f"Error getting available slots: {e}")
+            return []
     
     async def find_slots_by_preference(
         self,
@@ -252,22 +421,26 @@ class AppointmentService:
         """Find slots matching preferences."""
         start_date = preferred_date or date.today()
         all_slots = await self.get_available_slots(doctor_id, doctor_name, start_date, num_days=14)
-        
-        # Filter by time preference
+
+        # Filter by time preference; the window bounds are resolved once
+        # up front instead of re-lowercasing and re-comparing the
+        # preference string for every slot, and the scan stops as soon
+        # as num_slots matches are found
         if preferred_time:
+            window = self._TIME_WINDOWS.get(preferred_time.lower())
+            if window is None:
+                # Unknown preference strings match no window, same as
+                # the old chain of literal comparisons
+                return []
+            start_hour, end_hour = window
             filtered_slots = []
             for slot in all_slots:
-                hour = slot.start_time.hour
-                
-                if preferred_time.lower() == "morning" and 9 <= hour < 12:
-                    filtered_slots.append(slot)
-                elif preferred_time.lower() == "afternoon" and 12 <= hour < 17:
+                if start_hour <= slot.start_time.hour < end_hour:
                     filtered_slots.append(slot)
-                elif preferred_time.lower() == "evening" and 17 <= hour < 20:
-                    filtered_slots.append(slot)
-            
-            all_slots = filtered_slots
-        
+                    if len(filtered_slots) == num_slots:
+                        break
+            return filtered_slots
+
         return all_slots[:num_slots]
     
     async def _is_slot_available(
@@ -0,0 +1,66 @@
+from typing import Optional
+import asyncio
+from cachetools import TTLCache
+
+from app.models.conversation import ConversationContext
+from app.utils.logger import app_logger as logger
+
+
+class ConversationStore:
+    """Storage for conversation contexts with TTL-based expiry.
+
+    Wraps the bounded in-process cache behind a small get/set/delete
+    API so the HTTP routes and the websocket handler share one store,
+    and the backend can be swapped for a shared one (e.g. Redis with
+    EXPIRE) without touching the callers.
+    """
+
+    # Conversations idle longer than this age out automatically
+    TTL_SECONDS = 3600
+    MAX_CONVERSATIONS = 10_000
+
+    def __init__(self):
+        """Initialize conversation store."""
+        self._cache: TTLCache = TTLCache(
+            maxsize=self.MAX_CONVERSATIONS,
+            ttl=self.TTL_SECONDS
+        )
+        # Per-conversation locks, bounded/expired the same way as the
+        # contexts they guard
+        self._locks: TTLCache = TTLCache(
+            maxsize=self.MAX_CONVERSATIONS,
+            ttl=self.TTL_SECONDS
+        )
+        logger.info("Conversation store initialized")
+
+    def get(self, conversation_id: str) -> Optional[ConversationContext]:
+        """Get a conversation context, or None if expired/unknown."""
+        return self._cache.get(conversation_id)
+
+    def set(self, conversation_id: str, context: ConversationContext):
+        """Store a conversation context, refreshing its TTL."""
+        self._cache[conversation_id] = context
+
+    def delete(self, conversation_id: str) -> bool:
+        """Delete a conversation context; True if it existed."""
+        self._locks.pop(conversation_id, None)
+        return self._cache.pop(conversation_id, None) is not None
+
+    def lock(self, conversation_id: str) -> asyncio.Lock:
+        """Get the per-conversation lock.
+
+        Holding it for a whole turn keeps multi-await mutations of one
+        context atomic when the same conversation is reachable from
+        both the websocket and the HTTP routes.
+        """
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = self._locks[conversation_id] = asyncio.Lock()
+        return lock
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._cache
+
+
+# Create singleton instance
+conversation_store = ConversationStore()
@@ -1,4 +1,5 @@
 from typing import List, Optional, Dict
+from collections import OrderedDict
 from app.models.doctor import Doctor, Specialization, DoctorResponse
 from app.utils.logger import app_logger as logger
 from app.db.mongodb import get_database
@@ -6,10 +7,39 @@ from app.db.mongodb import get_database
 
 class DoctorService:
     """Service for managing doctors with MongoDB."""
-    
+
+    # Max cached search results before oldest entries are evicted
+    SEARCH_CACHE_SIZE = 512
+
     def __init__(self):
         """Initialize doctor service."""
+        # Lazily built lookup indexes over the (small, effectively
+        # static) doctor roster so resolution is one call instead of a
+        # cascade of by-name/search/by-specialization round trips
+        self._by_name_lower: Optional[Dict[str, Doctor]] = None
+        self._by_spec: Optional[Dict[Specialization, List[Doctor]]] = None
+        self._all_cached: List[Doctor] = []
+        # Memoized get_all_doctors results keyed by active_only; the
+        # roster only changes on (re)initialization, which busts these
+        self._all_cache: Dict[bool, List[Doctor]] = {}
+        # Roster version backs the ETag and keys the search cache, so a
+        # mutation invalidates both in one place
+        self._version = 0
+        self._search_cache: OrderedDict[str, List[Doctor]] = OrderedDict()
         logger.info("Doctor Service initialized with MongoDB")
+
+    def _invalidate_caches(self):
+        """Drop the roster caches after a doctor mutation."""
+        self._all_cache.clear()
+        self._by_name_lower = None
+        self._by_spec = None
+        self._all_cached = []
+        self._search_cache.clear()
+        self._version += 1
+
+    def etag(self) -> str:
+        """ETag for the current roster version, for HTTP caching."""
+        return f'"doctors-v{self._version}"'
     
     def _get_collection(self):
         """Get doctors collection."""
@@ -109,29 +139,37 @@ class DoctorService:
         ]
         
         await collection.insert_many(sample_doctors)
+        self._invalidate_caches()
         logger.info(f"Initialized {len(sample_doctors)} doctors in MongoDB")
         return True
     
     async def get_all_doctors(self, active_only: bool = True) -> List[Doctor]:
-        """Get all doctors from MongoDB."""
+        """Get all doctors, memoized since the roster rarely changes."""
+        cached = self._all_cache.get(active_only)
+        if cached is not None:
+            return cached
+
         try:
             collection = self._get_collection()
             if collection is None:
                 logger.warning("MongoDB not connected")
                 return []
-            
+
             query = {}
             if active_only:
                 query["is_active"] = True
-            
+
             cursor = collection.find(query)
             doctors = []
-            
+
             async for doc in cursor:
                 doctors.append(self._doc_to_model(doc))
-            
+
+            if doctors:
+                self._all_cache[active_only] = doctors
+
             return doctors
-            
+
         except Exception as e:
             logger.error(f"Error getting doctors: {e}")
             return []
@@ -155,18 +193,40 @@ class DoctorService:
             return None
     
     async def get_doctor_by_name(self, name: str) -> Optional[Doctor]:
-        """Get doctor by name from MongoDB."""
+        """Get doctor by name, served from the roster index when built.
+
+        The in-memory name index answers both hits and definite misses
+        in O(1)-ish time over the tiny roster, so a typo'd or unknown
+        name no longer costs a regex scan in MongoDB. The query path
+        only remains as a fallback for when the index can't be built
+        yet (e.g. the database wasn't connected at first call).
+        """
+        await self._ensure_indexes()
+
+        if self._by_name_lower is not None:
+            key = name.lower()
+            doctor = self._by_name_lower.get(key)
+            if doctor:
+                return doctor
+            # Partial matches ("Dr. Priya", "priya"), same as the old
+            # case-insensitive regex
+            for doctor_name, doctor in self._by_name_lower.items():
+                if key in doctor_name or doctor_name in key:
+                    return doctor
+            # Definite miss: the name is not in the roster
+            return None
+
         try:
             collection = self._get_collection()
             if collection is None:
                 logger.warning("MongoDB not connected")
                 return None
-            
+
             doc = await collection.find_one({
                 "name": {"$regex": name, "$options": "i"},
                 "is_active": True
             })
-            
+
             if doc:
                 return self._doc_to_model(doc)
             return None
@@ -200,14 +260,81 @@ class DoctorService:
             logger.error(f"Error getting doctors by specialization: {e}")
             return []
     
+    async def _ensure_indexes(self):
+        """Build the in-memory lookup indexes on first use."""
+        if self._by_name_lower is not None:
+            return
+
+        doctors = await self.get_all_doctors()
+        if not doctors:
+            # Leave indexes unbuilt so the next call retries (e.g. the
+            # database wasn't connected yet)
+            return
+
+        by_name = {}
+        by_spec: Dict[Specialization, List[Doctor]] = {}
+        for doctor in doctors:
+            by_name[doctor.name.lower()] = doctor
+            by_spec.setdefault(doctor.specialization, []).append(doctor)
+
+        self._by_name_lower = by_name
+        self._by_spec = by_spec
+        self._all_cached = doctors
+        logger.info(f"Doctor lookup indexes built for {len(doctors)} doctors")
+
+    async def resolve_doctor(
+        self,
+        name: Optional[str] = None,
+        specialization: Optional[Specialization] = None
+    ) -> Optional[Doctor]:
+        """
+        Resolve the best doctor in a single call.
+
+        Tries name match, then specialization, then falls back to a
+        general physician or any doctor — the same cascade callers used
+        to run as three or four separate service round trips. After the
+        lazy index build this touches the datastore at most once per
+        roster version, everything else is dict probes.
+        """
+        await self._ensure_indexes()
+
+        if not self._all_cached:
+            return None
+
+        if name:
+            key = name.lower()
+            doctor = self._by_name_lower.get(key)
+            if doctor:
+                return doctor
+            # Partial matches ("Dr. Priya", "priya") over a tiny roster
+            for doctor_name, doctor in self._by_name_lower.items():
+                if key in doctor_name or doctor_name in key:
+                    return doctor
+
+        if specialization:
+            doctors = self._by_spec.get(specialization)
+            if doctors:
+                return doctors[0]
+
+        general = self._by_spec.get(Specialization.GENERAL_PHYSICIAN)
+        if general:
+            return general[0]
+
+        return self._all_cached[0]
+
     async def search_doctors(self, query: str) -> List[Doctor]:
         """Search doctors by name or specialization."""
+        cached = self._search_cache.get(query)
+        if cached is not None:
+            self._search_cache.move_to_end(query)
+            return cached
+
         try:
             collection = self._get_collection()
             if collection is None:
                 logger.warning("MongoDB not connected")
                 return []
-            
+
             cursor = collection.find({
                 "$or": [
                     {"name": {"$regex": query, "$options": "i"}},
@@ -219,9 +346,13 @@ class DoctorService:
             doctors = []
             async for doc in cursor:
                 doctors.append(self._doc_to_model(doc))
-            
+
+            self._search_cache[query] = doctors
+            if len(self._search_cache) > self.SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+
             return doctors
-            
+
         except Exception as e:
             logger.error(f"Error searching doctors: {e}")
             return []
@@ -1,8 +1,8 @@
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from openai import AsyncOpenAI
 from app.config import settings
 from app.utils.logger import app_logger as logger
-import json
+import orjson
 
 
 class LLMService:
@@ -10,8 +10,14 @@ class LLMService:
 
     def __init__(self):
         """Initialize LLM service with OpenAI."""
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.LLM_MODEL
+        # Prebuilt defaults so the hot path sends plain dict payloads
+        self._payload_defaults = {
+            "model": self.model,
+            "temperature": 0.7,
+            "max_tokens": 1024
+        }
         logger.info(f"LLM Service initialized with OpenAI model: {self.model}")
 
     async def generate_response(
@@ -30,11 +36,11 @@ class LLMService:
                 formatted_messages.append({"role": "system", "content": system_prompt})
             formatted_messages.extend(messages)
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=formatted_messages,
-                temperature=temperature,
-                max_tokens=max_tokens
+            response = await self.client.chat.completions.create(
+                **{**self._payload_defaults,
+                   "messages": formatted_messages,
+                   "temperature": temperature,
+                   "max_tokens": max_tokens}
             )
 
             content = response.choices[0].message.content
@@ -74,8 +80,8 @@ class LLMService:
             else:
                 json_str = response.strip()
 
-            return json.loads(json_str)
-        except json.JSONDecodeError:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
             logger.warning(f"Failed to parse JSON from LLM response: {response}")
             return {}
 